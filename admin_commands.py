@@ -1,18 +1,147 @@
 import logging
 import os
 import json
+import platform
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from threading import Lock
+import psutil
 from telebot import types
 
-from config import ADMIN_IDS, MESSAGES
-from database import Database
+# orjson serializes several times faster than stdlib json; fall back to
+# stdlib when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from config import ADMIN_IDS, MESSAGES, MESSAGE_TEMPLATES
+from database import db
 from bot_handlers import bot
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-# Initialize database
-db = Database()
+# Telegram's global sendMessage cap (messages per second)
+BROADCAST_RATE_LIMIT = 30
+
+# Worker threads used to overlap the HTTPS round-trips of a broadcast batch
+BROADCAST_WORKERS = 10
+
+def _batched(iterable, size):
+    """Yield items from an iterable in lists of at most `size`."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _dump_export_record(user):
+    """Serialize one export record to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(user)
+    return json.dumps(user, ensure_ascii=False).encode('utf-8')
+
+def _send_broadcast_message(chat_id, text):
+    """Send one broadcast message, returning whether it succeeded."""
+    try:
+        bot.send_message(chat_id, text, parse_mode="Markdown")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send broadcast to {chat_id}: {e}")
+        return False
+
+# Admin IDs as a frozenset of ints for O(1) membership checks on the
+# raw Telegram user ID
+_ADMIN_ID_SET = frozenset(int(x) for x in ADMIN_IDS)
+
+# Hoisted out of the per-message decorator path
+_ADMIN_ONLY_MESSAGE = MESSAGES["admin_only"]
+
+def _open_read_conn():
+    """Open the tuned read-only connection used by /stats."""
+    conn = sqlite3.connect(db.db_file, check_same_thread=False)
+    conn.execute("PRAGMA query_only=1")
+    conn.execute("PRAGMA read_uncommitted=1")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MB memory-mapped IO
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+# Persistent read-only connection for /stats, kept open so repeated stats
+# queries reuse SQLite's per-connection statement cache and page cache
+# instead of paying connection setup each time
+_read_conn = _open_read_conn()
+_read_conn_lock = Lock()  # sqlite3 connections are not thread-safe by default
+
+# Short-lived cache for /stats so bursts of requests from several admins
+# collapse into one round of table counts
+STATS_CACHE_TTL = 30  # Seconds
+_stats_cache = {"t": 0.0, "v": None}
+
+# Constant message templates, bound once at import so each invocation only
+# pays a single format call
+_STATS_TMPL = (
+    "📊 *Estatísticas do Bot*\n\n"
+    "👥 *Usuários:* {user_count}\n"
+    "👥 *Usuários Ativos:* {active_user_count}\n"
+    "👥 *Grupos:* {group_count}\n"
+    "🔑 *Palavras-chave:* {keyword_count}\n"
+    "🔑 *Palavras-chave Únicas:* {unique_keyword_count}\n"
+    "🐦 *Tweets Processados:* {tweet_count}\n"
+    "💾 *Tamanho do Banco de Dados:* {db_size:.2f} MB\n"
+    "🕒 *Última Modificação:* {db_modified}\n"
+)
+
+_DEBUG_TMPL = (
+    "🔧 *Informações de Debug*\n\n"
+    "🖥️ *Sistema:* {system}\n"
+    "🐍 *Python:* {python}\n"
+    "⏱️ *Uptime:* {uptime}\n"
+    "💾 *Uso de Memória:* {memory_usage:.2f} MB\n"
+    "🔢 *PID:* {pid}\n"
+    "📂 *Diretório:* {cwd}\n"
+)
+
+_BROADCAST_START_TMPL = "🔄 Iniciando broadcast para {total} usuários..."
+_BROADCAST_PROGRESS_TMPL = "🔄 Broadcast em andamento... {sent}/{total}"
+_BROADCAST_DONE_TMPL = (
+    "✅ Broadcast concluído!\n\n"
+    "✓ Enviados: {success_count}\n"
+    "❌ Falhas: {fail_count}"
+)
+
+def _invalidate_stats_cache():
+    """Drop the cached /stats counters after a data-changing command."""
+    _stats_cache["t"] = 0.0
+    _stats_cache["v"] = None
+
+def _on_database_restore():
+    """Reopen the /stats connection after a restore replaces the file.
+
+    The persistent connection keeps the pre-restore file open, so it
+    would serve stale data indefinitely without this hook.
+    """
+    global _read_conn
+    with _read_conn_lock:
+        _read_conn.close()
+        _read_conn = _open_read_conn()
+    _invalidate_stats_cache()
+
+db.register_restore_listener(_on_database_restore)
+
+# Process handle and static platform info for /debug, resolved once at
+# import so the handler only samples memory usage live
+_PROCESS = psutil.Process(os.getpid())
+_PROCESS_START = _PROCESS.create_time()
+_PYTHON_VERSION = platform.python_version()
+_SYSTEM_INFO = f"{platform.system()} {platform.release()}"
 
 class AdminCommands:
     """Admin command handlers and utilities."""
@@ -20,14 +149,18 @@ class AdminCommands:
     @staticmethod
     def is_admin(user_id):
         """Check if a user is an admin."""
-        return str(user_id) in ADMIN_IDS
+        return user_id in _ADMIN_ID_SET
     
     @staticmethod
     def require_admin(func):
         """Decorator to require admin privileges for a function."""
+        # Bind the membership check once so the per-message wrapper avoids
+        # the attribute-lookup chain and str() allocation
+        _check = _ADMIN_ID_SET.__contains__
+
         def wrapper(message, *args, **kwargs):
-            if not AdminCommands.is_admin(message.from_user.id):
-                bot.reply_to(message, MESSAGES["admin_only"])
+            if not _check(message.from_user.id):
+                bot.reply_to(message, _ADMIN_ONLY_MESSAGE)
                 return
             return func(message, *args, **kwargs)
         return wrapper
@@ -37,46 +170,51 @@ class AdminCommands:
     def stats(message):
         """Show bot statistics."""
         try:
-            # Get database statistics
-            with db.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Count users
-                cursor.execute("SELECT COUNT(*) FROM users")
-                user_count = cursor.fetchone()[0]
-                
-                # Count groups
-                cursor.execute("SELECT COUNT(*) FROM groups")
-                group_count = cursor.fetchone()[0]
-                
-                # Count keywords
-                cursor.execute("SELECT COUNT(*) FROM keywords")
-                keyword_count = cursor.fetchone()[0]
-                
-                # Count tweets
-                cursor.execute("SELECT COUNT(*) FROM tweets")
-                tweet_count = cursor.fetchone()[0]
-                
-                # Get active users (with groups)
-                cursor.execute("SELECT COUNT(*) FROM users WHERE group_id IS NOT NULL AND group_id != ''")
-                active_user_count = cursor.fetchone()[0]
-                
-                # Get unique keywords
-                cursor.execute("SELECT COUNT(DISTINCT keyword) FROM keywords")
-                unique_keyword_count = cursor.fetchone()[0]
-                
-                # Get database file size
-                db_size = os.path.getsize(db.db_file) / (1024 * 1024)  # Size in MB
+            # Serve the counters from the cache while it is fresh
+            if time.monotonic() - _stats_cache["t"] < STATS_CACHE_TTL and _stats_cache["v"]:
+                (user_count, group_count, keyword_count, tweet_count,
+                 active_user_count, unique_keyword_count, db_size, db_mtime) = _stats_cache["v"]
+            else:
+                # Get database statistics in a single round-trip using scalar
+                # subqueries instead of one query per counter, on the
+                # long-lived read-only connection. The unique-keyword count
+                # stays exact: the GROUP BY runs off idx_keywords_keyword as
+                # an index-only scan and the TTL cache absorbs repeat calls,
+                # so an approximate (HLL-style) counter isn't worth a
+                # dependency here.
+                with _read_conn_lock:
+                    cursor = _read_conn.execute(
+                        """SELECT
+                           (SELECT COUNT(*) FROM users),
+                           (SELECT COUNT(*) FROM groups),
+                           (SELECT COUNT(*) FROM keywords),
+                           (SELECT COUNT(*) FROM tweets),
+                           (SELECT COUNT(*) FROM users WHERE group_id IS NOT NULL AND group_id != ''),
+                           (SELECT COUNT(*) FROM (SELECT 1 FROM keywords GROUP BY keyword))"""
+                    )
+                    (user_count, group_count, keyword_count, tweet_count,
+                     active_user_count, unique_keyword_count) = cursor.fetchone()
+
+                # Get database file size and last-modified time from one stat call
+                db_stat = os.stat(db.db_file)
+                db_size = db_stat.st_size / (1024 * 1024)  # Size in MB
+                db_mtime = db_stat.st_mtime
+
+                _stats_cache["v"] = (user_count, group_count, keyword_count, tweet_count,
+                                     active_user_count, unique_keyword_count, db_size, db_mtime)
+                _stats_cache["t"] = time.monotonic()
             
             # Format stats message
-            stats_message = "📊 *Estatísticas do Bot*\n\n"
-            stats_message += f"👥 *Usuários:* {user_count}\n"
-            stats_message += f"👥 *Usuários Ativos:* {active_user_count}\n"
-            stats_message += f"👥 *Grupos:* {group_count}\n"
-            stats_message += f"🔑 *Palavras-chave:* {keyword_count}\n"
-            stats_message += f"🔑 *Palavras-chave Únicas:* {unique_keyword_count}\n"
-            stats_message += f"🐦 *Tweets Processados:* {tweet_count}\n"
-            stats_message += f"💾 *Tamanho do Banco de Dados:* {db_size:.2f} MB\n"
+            stats_message = _STATS_TMPL.format(
+                user_count=user_count,
+                active_user_count=active_user_count,
+                group_count=group_count,
+                keyword_count=keyword_count,
+                unique_keyword_count=unique_keyword_count,
+                tweet_count=tweet_count,
+                db_size=db_size,
+                db_modified=datetime.fromtimestamp(db_mtime).strftime('%d/%m/%Y %H:%M:%S')
+            )
             
             # Send stats message
             bot.send_message(
@@ -96,7 +234,7 @@ class AdminCommands:
         if backup_file:
             bot.reply_to(
                 message,
-                MESSAGES["backup_success"].format(backup_file=backup_file)
+                MESSAGE_TEMPLATES["backup_success"].substitute(backup_file=backup_file)
             )
         else:
             bot.reply_to(message, "❌ Falha ao criar backup do banco de dados.")
@@ -112,47 +250,64 @@ class AdminCommands:
             return
         
         broadcast_text = command_parts[1].strip()
-        
-        # Get all users
-        users = db.list_users()
-        
+
+        # Total is known up front from one COUNT(*); the chat IDs themselves
+        # are streamed so sending starts before the whole table is read
+        total_users = db.count_users()
+
         # Counter for successful sends
         success_count = 0
         fail_count = 0
-        
+
         # Start broadcast
         status_message = bot.reply_to(
             message,
-            f"🔄 Iniciando broadcast para {len(users)} usuários..."
+            _BROADCAST_START_TMPL.format(total=total_users)
         )
         
-        # Send messages
-        for i, user in enumerate(users):
-            try:
-                # Send message
-                bot.send_message(
-                    user['chat_id'],
-                    f"📢 *Anúncio do Administrador*\n\n{broadcast_text}",
-                    parse_mode="Markdown"
-                )
-                success_count += 1
-                
-                # Update status every 10 users
-                if i % 10 == 0:
-                    bot.edit_message_text(
-                        f"🔄 Broadcast em andamento... {i+1}/{len(users)}",
-                        chat_id=status_message.chat.id,
-                        message_id=status_message.message_id
-                    )
-            except Exception as e:
-                logger.error(f"Failed to send broadcast to {user['chat_id']}: {e}")
-                fail_count += 1
+        # Send in batches sized to the Telegram rate limit, pacing each
+        # batch to a one-second window so the limit is saturated but never
+        # exceeded
+        broadcast_message = f"📢 *Anúncio do Administrador*\n\n{broadcast_text}"
+        sent_total = 0
+        next_update_at = time.monotonic() + 3.0
+        last_edit_text = None
+
+        with ThreadPoolExecutor(max_workers=BROADCAST_WORKERS) as executor:
+            for batch in _batched(db.iter_chat_ids(), BROADCAST_RATE_LIMIT):
+                window_start = time.monotonic()
+
+                # Fan the batch out over the worker pool so the HTTPS
+                # round-trips overlap instead of running back-to-back
+                results = list(executor.map(
+                    lambda chat_id: _send_broadcast_message(chat_id, broadcast_message),
+                    batch
+                ))
+                success_count += sum(results)
+                fail_count += len(results) - sum(results)
+                sent_total += len(batch)
+
+                # Update status at most every 3 seconds so progress edits
+                # don't compete with broadcast sends for the rate limit
+                if time.monotonic() >= next_update_at:
+                    edit_text = _BROADCAST_PROGRESS_TMPL.format(sent=sent_total, total=total_users)
+                    if edit_text != last_edit_text:
+                        bot.edit_message_text(
+                            edit_text,
+                            chat_id=status_message.chat.id,
+                            message_id=status_message.message_id
+                        )
+                        last_edit_text = edit_text
+                    next_update_at = time.monotonic() + 3.0
+
+                # Wait out the rest of the one-second window before the next batch
+                elapsed = time.monotonic() - window_start
+                if elapsed < 1.0 and sent_total < total_users:
+                    time.sleep(1.0 - elapsed)
         
         # Final status
         bot.edit_message_text(
-            f"✅ Broadcast concluído!\n\n"
-            f"✓ Enviados: {success_count}\n"
-            f"❌ Falhas: {fail_count}",
+            _BROADCAST_DONE_TMPL.format(success_count=success_count, fail_count=fail_count),
             chat_id=status_message.chat.id,
             message_id=status_message.message_id
         )
@@ -162,28 +317,30 @@ class AdminCommands:
     def export_users(message):
         """Export users to JSON file."""
         try:
-            # Get all users with keywords
-            users = db.list_users(with_keywords=True)
-            
-            # Create export directory if it doesn't exist
-            export_dir = "exports"
-            if not os.path.exists(export_dir):
-                os.makedirs(export_dir)
-            
             # Generate filename with timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{export_dir}/users_export_{timestamp}.json"
-            
-            # Write JSON file
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(users, f, ensure_ascii=False, indent=2)
-            
-            # Send file
-            with open(filename, 'rb') as f:
+            filename = f"users_export_{timestamp}.json"
+
+            # Stream users into an in-memory buffer (spilling to disk only
+            # past 8 MB) so the export is written and uploaded in one pass
+            # without a temporary file on disk
+            user_count = 0
+            with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode='w+b') as buf:
+                buf.write(b'[')
+                for user in db.iter_users(with_keywords=True):
+                    if user_count:
+                        buf.write(b',')
+                    buf.write(_dump_export_record(user))
+                    user_count += 1
+                buf.write(b']')
+
+                # Rewind and upload straight from the buffer
+                buf.seek(0)
                 bot.send_document(
                     message.chat.id,
-                    f,
-                    caption=f"✅ Exportação concluída: {len(users)} usuários"
+                    buf,
+                    caption=f"✅ Exportação concluída: {user_count} usuários",
+                    visible_file_name=filename
                 )
         except Exception as e:
             logger.error(f"Error exporting users: {e}")
@@ -199,42 +356,51 @@ class AdminCommands:
             bot.reply_to(message, "❓ Uso: /finduser TERMO_DE_BUSCA")
             return
         
-        search_term = command_parts[1].strip().lower()
-        
-        # Get all users
-        users = db.list_users(with_keywords=True)
-        
-        # Filter users
-        found_users = []
-        for user in users:
-            if (search_term in user['name'].lower() or
-                search_term in user['email'].lower() or
-                search_term == user['chat_id']):
-                found_users.append(user)
-        
+        search_term = command_parts[1].strip()
+
+        # Let SQLite filter the users instead of scanning them all in Python
+        found_users = db.search_users(search_term)
+
         if not found_users:
             bot.reply_to(message, "❌ Nenhum usuário encontrado.")
             return
         
-        # Format results
-        result_message = f"🔍 *Usuários Encontrados ({len(found_users)})*\n\n"
-        
+        # Format results, accumulating parts in a list and joining once
+        parts = [f"🔍 *Usuários Encontrados ({len(found_users)})*\n\n"]
+        parts_len = len(parts[0])
+
         for i, user in enumerate(found_users):
             # Format keywords
             keywords_str = ", ".join(user['keywords']) if 'keywords' in user and user['keywords'] else "Nenhum"
-            
-            result_message += f"{i+1}. *{user['name']}*\n"
-            result_message += f"   ID: `{user['chat_id']}`\n"
-            result_message += f"   Email: {user['email']}\n"
-            result_message += f"   Interesses: {keywords_str}\n"
-            result_message += f"   Grupo: {user['group_id'] or 'Não atribuído'}\n\n"
-        
-        # Send results
-        bot.send_message(
-            message.chat.id,
-            result_message,
-            parse_mode="Markdown"
-        )
+
+            entry = (
+                f"{i+1}. *{user['name']}*\n"
+                f"   ID: `{user['chat_id']}`\n"
+                f"   Email: {user['email']}\n"
+                f"   Interesses: {keywords_str}\n"
+                f"   Grupo: {user['group_id'] or 'Não atribuído'}\n\n"
+            )
+
+            # Flush before exceeding the Telegram per-message length cap
+            if parts_len + len(entry) > 3500:
+                bot.send_message(
+                    message.chat.id,
+                    "".join(parts),
+                    parse_mode="Markdown"
+                )
+                parts = []
+                parts_len = 0
+
+            parts.append(entry)
+            parts_len += len(entry)
+
+        # Send the remaining results
+        if parts:
+            bot.send_message(
+                message.chat.id,
+                "".join(parts),
+                parse_mode="Markdown"
+            )
     
     @staticmethod
     @require_admin
@@ -251,6 +417,7 @@ class AdminCommands:
         # Add group
         group_id = db.add_group(group_id)
         if group_id:
+            _invalidate_stats_cache()
             bot.reply_to(message, f"✅ Grupo adicionado com ID: {group_id}")
         else:
             bot.reply_to(message, "❌ Falha ao adicionar grupo.")
@@ -260,27 +427,22 @@ class AdminCommands:
     def debug(message):
         """Print debug information."""
         try:
-            # System info
-            import platform
-            import psutil
-            import time
-            
-            # Get memory usage
-            process = psutil.Process(os.getpid())
-            memory_usage = process.memory_info().rss / (1024 * 1024)  # Memory in MB
-            
+            # Get memory usage (the only live sample; the rest is static)
+            memory_usage = _PROCESS.memory_info().rss / (1024 * 1024)  # Memory in MB
+
             # Get uptime
-            uptime = time.time() - process.create_time()
+            uptime = time.time() - _PROCESS_START
             uptime_str = f"{int(uptime // 3600)}h {int((uptime % 3600) // 60)}m {int(uptime % 60)}s"
-            
+
             # Debug message
-            debug_message = "🔧 *Informações de Debug*\n\n"
-            debug_message += f"🖥️ *Sistema:* {platform.system()} {platform.release()}\n"
-            debug_message += f"🐍 *Python:* {platform.python_version()}\n"
-            debug_message += f"⏱️ *Uptime:* {uptime_str}\n"
-            debug_message += f"💾 *Uso de Memória:* {memory_usage:.2f} MB\n"
-            debug_message += f"🔢 *PID:* {os.getpid()}\n"
-            debug_message += f"📂 *Diretório:* {os.getcwd()}\n"
+            debug_message = _DEBUG_TMPL.format(
+                system=_SYSTEM_INFO,
+                python=_PYTHON_VERSION,
+                uptime=uptime_str,
+                memory_usage=memory_usage,
+                pid=os.getpid(),
+                cwd=os.getcwd()
+            )
             
             # Send debug info
             bot.send_message(
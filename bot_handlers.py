@@ -1,82 +1,173 @@
 import telebot
+import functools
 import logging
-from telebot import types
+import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from telebot import types
+from dataclasses import dataclass
+from enum import IntEnum
 from datetime import datetime
+from cachetools import TTLCache
 
-from config import TELEGRAM_BOT_TOKEN, MESSAGES, ADMIN_IDS
-from database import Database
+from config import TELEGRAM_BOT_TOKEN, MESSAGES, MESSAGE_TEMPLATES, ADMIN_IDS
+from database import db
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-# Initialize bot
-bot = telebot.TeleBot(TELEGRAM_BOT_TOKEN)
+# Initialize bot with a worker pool so one slow handler doesn't stall
+# every other user's update
+bot = telebot.TeleBot(TELEGRAM_BOT_TOKEN, threaded=True, num_threads=8)
+
+# Conversation state, bounded and expiring so abandoned dialogues don't
+# accumulate forever; guarded by a lock since handlers run on worker threads
+user_states = TTLCache(maxsize=10000, ttl=1800)
+_state_lock = threading.RLock()
+
+def get_state(chat_id):
+    """Get the conversation state for a chat, or None if there is none."""
+    with _state_lock:
+        return user_states.get(chat_id)
+
+def set_state(chat_id, state_info):
+    """Set the conversation state for a chat."""
+    with _state_lock:
+        user_states[chat_id] = state_info
+
+def clear_state(chat_id):
+    """Remove the conversation state for a chat, if any."""
+    with _state_lock:
+        user_states.pop(chat_id, None)
+
+def has_state(chat_id):
+    """Check whether a chat has an active conversation."""
+    with _state_lock:
+        return chat_id in user_states
+
+def is_admin(chat_id):
+    """Check if a chat ID belongs to an admin."""
+    return str(chat_id) in ADMIN_IDS
+
+class _TokenBucket:
+    """Token bucket enforcing a per-second cap on outbound sends."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.window_start = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a send token is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now - self.window_start >= 1.0:
+                    self.tokens = self.rate
+                    self.window_start = now
+                if self.tokens > 0:
+                    self.tokens -= 1
+                    return
+                wait = self.window_start + 1.0 - now
+            time.sleep(max(wait, 0.0))
+
+# Shared sender pool for notification fan-out, paced to Telegram's global
+# 30 msg/s sendMessage limit
+SEND_RATE_LIMIT = 30
+_send_bucket = _TokenBucket(SEND_RATE_LIMIT)
+_send_executor = ThreadPoolExecutor(max_workers=8)
 
-# Initialize database
-db = Database()
+def admin_only(func):
+    """Decorator that rejects non-admin chats before running a handler."""
+    # Capture the rejection text once instead of a dict lookup per call
+    admin_msg = MESSAGES["admin_only"]
 
-# User states
-user_states = {}
+    @functools.wraps(func)
+    def wrapper(message, *args, **kwargs):
+        if not is_admin(message.chat.id):
+            bot.send_message(message.chat.id, admin_msg)
+            return
+        return func(message, *args, **kwargs)
+    return wrapper
 
-class ConversationState:
+class ConversationState(IntEnum):
     """Enum for conversation states."""
-    AWAITING_NAME = 'awaiting_name'
-    AWAITING_EMAIL = 'awaiting_email'
-    AWAITING_INTENTION = 'awaiting_intention'
-    AWAITING_INTERESTS = 'awaiting_interests'
-    AWAITING_ADMIN_COMMAND = 'awaiting_admin_command'
+    AWAITING_NAME = 1
+    AWAITING_EMAIL = 2
+    AWAITING_INTENTION = 3
+    AWAITING_INTERESTS = 4
+    AWAITING_ADMIN_COMMAND = 5
+
+@dataclass(slots=True)
+class ConvState:
+    """Per-chat conversation state.
+
+    Slotted attributes cost one offset lookup per access and roughly half
+    the memory of the nested dicts they replace.
+    """
+    state: ConversationState
+    name: str = ""
+    email: str = ""
+    intention: str = ""
+    user_id: int | None = None
+    update_mode: bool = False
+
+# Static keyboards, built once at import since they never change for the
+# lifetime of the bot
+_ADMIN_KEYBOARD = types.ReplyKeyboardMarkup(row_width=2, resize_keyboard=True)
+_ADMIN_KEYBOARD.add(
+    types.KeyboardButton('📊 List Users'),
+    types.KeyboardButton('🔍 Find User'),
+    types.KeyboardButton('🗑️ Remove User'),
+    types.KeyboardButton('💾 Backup Database'),
+    types.KeyboardButton('♻️ Restore Database'),
+    types.KeyboardButton('❌ Cancel')
+)
+
+_NO_BACKUPS_KEYBOARD = types.InlineKeyboardMarkup(row_width=1)
+_NO_BACKUPS_KEYBOARD.add(types.InlineKeyboardButton("No backups found", callback_data="no_backups"))
 
 # Function to generate keyboard for admin commands
 def get_admin_keyboard():
-    """Generate a keyboard for admin commands."""
-    markup = types.ReplyKeyboardMarkup(row_width=2, resize_keyboard=True)
-    
-    # Add buttons for admin actions
-    markup.add(
-        types.KeyboardButton('📊 List Users'),
-        types.KeyboardButton('🔍 Find User'),
-        types.KeyboardButton('🗑️ Remove User'),
-        types.KeyboardButton('💾 Backup Database'),
-        types.KeyboardButton('♻️ Restore Database'),
-        types.KeyboardButton('❌ Cancel')
-    )
-    
-    return markup
+    """Return the keyboard for admin commands."""
+    return _ADMIN_KEYBOARD
+
+# Backup filename timestamp format and its display form
+_BACKUP_DATE_FMT = "%Y%m%d_%H%M%S"
+_BACKUP_DISPLAY_FMT = "%d/%m/%Y %H:%M"
+
+# Cached directory listing for backup selection, keyed by the directory
+# mtime so it refreshes only when a backup is created or pruned
+@functools.lru_cache(maxsize=4)
+def _list_backups(backup_dir, _mtime_ns):
+    """List backup files sorted by date (newest first)."""
+    return sorted((f for f in os.listdir(backup_dir) if f.startswith("backup_")), reverse=True)
 
 # Function to generate inline keyboard for backup selection
 def get_backup_selection_keyboard():
     """Generate inline keyboard for selecting a backup file."""
-    import os
-    
     markup = types.InlineKeyboardMarkup(row_width=1)
-    
+
     # Check for backup files
     backup_dir = "backups"
     if not os.path.exists(backup_dir):
-        markup.add(types.InlineKeyboardButton("No backups found", callback_data="no_backups"))
-        return markup
-    
-    # List backup files, sort by date (newest first)
-    backups = sorted([f for f in os.listdir(backup_dir) if f.startswith("backup_")], reverse=True)
+        return _NO_BACKUPS_KEYBOARD
+
+    # List backup files (cached until the directory changes)
+    backups = _list_backups(backup_dir, os.stat(backup_dir).st_mtime_ns)
     
     if not backups:
-        markup.add(types.InlineKeyboardButton("No backups found", callback_data="no_backups"))
-        return markup
+        return _NO_BACKUPS_KEYBOARD
     
     # Add buttons for each backup (limit to 5)
     for backup in backups[:5]:
-        # Extract date from filename for display
+        # Parse the filename timestamp and format it for display
         date_str = backup.replace("backup_", "").replace(".db", "")
-        year = date_str[:4]
-        month = date_str[4:6]
-        day = date_str[6:8]
-        hour = date_str[9:11]
-        minute = date_str[11:13]
-        
-        # Format date for display
-        display_date = f"{day}/{month}/{year} {hour}:{minute}"
-        
+        display_date = datetime.strptime(date_str, _BACKUP_DATE_FMT).strftime(_BACKUP_DISPLAY_FMT)
+
         markup.add(types.InlineKeyboardButton(
             f"Backup from {display_date}",
             callback_data=f"restore_{backup}"
@@ -87,6 +178,24 @@ def get_backup_selection_keyboard():
     
     return markup
 
+# Commands surfaced in Telegram's client-side command menu
+_BOT_COMMANDS = [
+    ('start', 'Iniciar ou reiniciar o bot'),
+    ('status', 'Ver seu status atual'),
+    ('update', 'Atualizar suas preferências'),
+    ('help', 'Exibir a mensagem de ajuda'),
+]
+
+def register_bot_commands():
+    """Register the command menu with Telegram once at startup."""
+    try:
+        bot.set_my_commands([types.BotCommand(cmd, desc) for cmd, desc in _BOT_COMMANDS])
+        logger.info("Bot command menu registered")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to register bot commands: {e}")
+        return False
+
 # Function to send a help message with command descriptions
 def send_help_message(chat_id):
     """Send help message with available commands."""
@@ -113,14 +222,12 @@ def handle_start(message):
         return
     
     # New user, start registration process
-    user_states[chat_id] = {
-        "state": ConversationState.AWAITING_NAME,
-        "data": {}
-    }
+    set_state(chat_id, ConvState(state=ConversationState.AWAITING_NAME))
     
-    # Send welcome message
+    # Send welcome message. The typing indicator gives the old sleep-based
+    # pause its UX effect without blocking a handler thread.
     bot.send_message(chat_id, MESSAGES["welcome"])
-    time.sleep(1)  # Small delay for better UX
+    bot.send_chat_action(chat_id, 'typing')
     bot.send_message(chat_id, MESSAGES["ask_name"])
 
 @bot.message_handler(commands=['help'])
@@ -145,19 +252,22 @@ def handle_status(message):
     
     # Format keywords for display
     keywords_str = ", ".join(user['keywords']) if user['keywords'] else "Nenhuma"
-    
-    # Create status message
-    status_msg = f"📊 *Seu Perfil*\n\n"
-    status_msg += f"👤 *Nome:* {user['name']}\n"
-    status_msg += f"📧 *Email:* {user['email']}\n"
-    status_msg += f"🎯 *Intenção:* {user['intention']}\n"
-    status_msg += f"🔑 *Interesses:* {keywords_str}\n\n"
-    
+
+    # Create status message in a single f-string instead of repeated +=
     if user['group_id']:
-        status_msg += f"🔗 *Link do Grupo:* {user['invite_link']}\n"
+        group_line = f"🔗 *Link do Grupo:* {user['invite_link']}\n"
     else:
-        status_msg += "⏳ *Status do Grupo:* Aguardando criação\n"
-    
+        group_line = "⏳ *Status do Grupo:* Aguardando criação\n"
+
+    status_msg = (
+        f"📊 *Seu Perfil*\n\n"
+        f"👤 *Nome:* {user['name']}\n"
+        f"📧 *Email:* {user['email']}\n"
+        f"🎯 *Intenção:* {user['intention']}\n"
+        f"🔑 *Interesses:* {keywords_str}\n\n"
+        f"{group_line}"
+    )
+
     bot.send_message(
         chat_id,
         status_msg,
@@ -179,16 +289,14 @@ def handle_update(message):
         return
     
     # Start update process - for now, we'll only allow updating interests
-    user_states[chat_id] = {
-        "state": ConversationState.AWAITING_INTERESTS,
-        "data": {
-            "name": user['name'],
-            "email": user['email'],
-            "intention": user['intention'],
-            "update_mode": True,
-            "user_id": user['id']
-        }
-    }
+    set_state(chat_id, ConvState(
+        state=ConversationState.AWAITING_INTERESTS,
+        name=user['name'],
+        email=user['email'],
+        intention=user['intention'],
+        user_id=user['id'],
+        update_mode=True
+    ))
     
     bot.send_message(
         chat_id,
@@ -203,15 +311,11 @@ def handle_myid(message):
 
 # Admin command handlers
 @bot.message_handler(commands=['admin'])
+@admin_only
 def handle_admin(message):
     """Handle the /admin command."""
     chat_id = message.chat.id
     
-    # Check if user is admin
-    if str(chat_id) not in ADMIN_IDS:
-        bot.send_message(chat_id, MESSAGES["admin_only"])
-        return
-    
     # Send admin menu
     bot.send_message(
         chat_id,
@@ -221,41 +325,30 @@ def handle_admin(message):
     )
     
     # Set admin state
-    user_states[chat_id] = {
-        "state": ConversationState.AWAITING_ADMIN_COMMAND,
-        "data": {}
-    }
+    set_state(chat_id, ConvState(state=ConversationState.AWAITING_ADMIN_COMMAND))
 
 @bot.message_handler(commands=['backup'])
+@admin_only
 def handle_backup(message):
     """Handle the /backup command."""
     chat_id = message.chat.id
     
-    # Check if user is admin
-    if str(chat_id) not in ADMIN_IDS:
-        bot.send_message(chat_id, MESSAGES["admin_only"])
-        return
-    
     # Create database backup
     backup_file = db.backup_database()
     if backup_file:
         bot.send_message(
             chat_id,
-            MESSAGES["backup_success"].format(backup_file=backup_file)
+            MESSAGE_TEMPLATES["backup_success"].substitute(backup_file=backup_file)
         )
     else:
         bot.send_message(chat_id, "❌ Falha ao criar backup do banco de dados.")
 
 @bot.message_handler(commands=['restore'])
+@admin_only
 def handle_restore(message):
     """Handle the /restore command."""
     chat_id = message.chat.id
     
-    # Check if user is admin
-    if str(chat_id) not in ADMIN_IDS:
-        bot.send_message(chat_id, MESSAGES["admin_only"])
-        return
-    
     # Send backup selection keyboard
     bot.send_message(
         chat_id,
@@ -265,26 +358,21 @@ def handle_restore(message):
     )
 
 @bot.message_handler(commands=['removeuser'])
+@admin_only
 def handle_remove_user(message):
     """Handle the /removeuser command."""
     chat_id = message.chat.id
     
-    # Check if user is admin
-    if str(chat_id) not in ADMIN_IDS:
-        bot.send_message(chat_id, MESSAGES["admin_only"])
-        return
-    
-    # Extract command parameters
-    parts = message.text.split()
-    if len(parts) < 2:
+    # Extract command parameter without allocating a split list
+    _, _, target_id = message.text.partition(' ')
+    target_id = target_id.strip()
+    if not target_id:
         bot.send_message(
             chat_id,
             "❓ Uso correto: /removeuser ID_DO_USUARIO"
         )
         return
     
-    target_id = parts[1]
-    
     # Try to remove user
     if db.remove_user(target_id):
         bot.send_message(chat_id, MESSAGES["user_removed"])
@@ -292,281 +380,314 @@ def handle_remove_user(message):
         bot.send_message(chat_id, MESSAGES["user_not_found"])
 
 @bot.message_handler(commands=['listusers'])
+@admin_only
 def handle_list_users(message):
     """Handle the /listusers command."""
     chat_id = message.chat.id
     
-    # Check if user is admin
-    if str(chat_id) not in ADMIN_IDS:
-        bot.send_message(chat_id, MESSAGES["admin_only"])
-        return
-    
-    # Get users with keywords
-    users = db.list_users(with_keywords=True)
-    
-    if not users:
-        bot.send_message(chat_id, "Não há usuários registrados.")
-        return
-    
-    # Format user list in chunks to avoid message length limits
-    user_chunks = []
-    current_chunk = ""
-    
-    for i, user in enumerate(users):
+    # Stream users straight from the database and flush each chunk as it
+    # fills, so sending overlaps with the table scan and only one chunk
+    # is ever held in memory
+    current_chunk = []
+    current_len = 0
+    part = 0
+    index = 0
+
+    for user in db.iter_users(with_keywords=True):
+        index += 1
+
         # Format keywords
-        keywords_str = ", ".join(user['keywords']) if 'keywords' in user and user['keywords'] else "None"
-        
+        keywords_str = ", ".join(user['keywords']) if user['keywords'] else "None"
+
         # Create user entry
-        user_entry = f"{i+1}. *{user['name']}*\n"
-        user_entry += f"   ID: `{user['chat_id']}`\n"
-        user_entry += f"   Email: {user['email']}\n"
-        user_entry += f"   Interesses: {keywords_str}\n"
-        user_entry += f"   Grupo: {user['group_id'] or 'Não atribuído'}\n\n"
-        
-        # Check if adding this entry would exceed message limit
-        if len(current_chunk) + len(user_entry) > 4000:
-            user_chunks.append(current_chunk)
-            current_chunk = user_entry
-        else:
-            current_chunk += user_entry
-    
-    # Add the last chunk if not empty
+        user_entry = (
+            f"{index}. *{user['name']}*\n"
+            f"   ID: `{user['chat_id']}`\n"
+            f"   Email: {user['email']}\n"
+            f"   Interesses: {keywords_str}\n"
+            f"   Grupo: {user['group_id'] or 'Não atribuído'}\n\n"
+        )
+
+        # Flush before the chunk would exceed the message length limit
+        if current_chunk and current_len + len(user_entry) > 4000:
+            part += 1
+            bot.send_message(
+                chat_id,
+                f"📋 *Lista de Usuários (Parte {part})*\n\n" + "".join(current_chunk),
+                parse_mode="Markdown"
+            )
+            current_chunk = []
+            current_len = 0
+
+        current_chunk.append(user_entry)
+        current_len += len(user_entry)
+
+    if not index:
+        bot.send_message(chat_id, "Não há usuários registrados.")
+        return
+
+    # Send the remaining chunk
     if current_chunk:
-        user_chunks.append(current_chunk)
-    
-    # Send messages
-    for i, chunk in enumerate(user_chunks):
-        header = f"📋 *Lista de Usuários ({i+1}/{len(user_chunks)})*\n\n"
+        part += 1
         bot.send_message(
             chat_id,
-            header + chunk,
+            f"📋 *Lista de Usuários (Parte {part})*\n\n" + "".join(current_chunk),
             parse_mode="Markdown"
         )
 
 # Callback query handler for inline buttons
 @bot.callback_query_handler(func=lambda call: True)
-def handle_callback_query(call):
+def handle_callback_query(call, *, _M=MESSAGES, _bot=bot):
     """Handle callback queries from inline keyboards."""
     chat_id = call.message.chat.id
-    
+
     # Check if it's a restore operation
     if call.data.startswith("restore_"):
         # Check if user is admin
-        if str(chat_id) not in ADMIN_IDS:
-            bot.answer_callback_query(call.id, "Você não tem permissão para esta ação.")
+        if not is_admin(chat_id):
+            _bot.answer_callback_query(call.id, "Você não tem permissão para esta ação.")
             return
-        
+
         # Extract backup filename
         backup_file = call.data.replace("restore_", "")
         backup_path = f"backups/{backup_file}"
-        
+
         # Confirm restoration
-        bot.edit_message_text(
+        _bot.edit_message_text(
             f"🔄 Restaurando banco de dados a partir de {backup_file}...",
             chat_id=chat_id,
             message_id=call.message.message_id
         )
-        
+
         # Perform restoration
         success = db.restore_database(backup_path)
-        
+
         if success:
-            bot.edit_message_text(
-                MESSAGES["restore_success"],
+            _bot.edit_message_text(
+                _M["restore_success"],
                 chat_id=chat_id,
                 message_id=call.message.message_id
             )
         else:
-            bot.edit_message_text(
-                MESSAGES["restore_failed"],
+            _bot.edit_message_text(
+                _M["restore_failed"],
                 chat_id=chat_id,
                 message_id=call.message.message_id
             )
-    
+
     elif call.data == "cancel_restore":
-        bot.edit_message_text(
+        _bot.edit_message_text(
             "❌ Operação de restauração cancelada.",
             chat_id=chat_id,
             message_id=call.message.message_id
         )
-    
+
     elif call.data == "no_backups":
-        bot.answer_callback_query(call.id, "Não há backups disponíveis.")
+        _bot.answer_callback_query(call.id, "Não há backups disponíveis.")
 
-# Handle text messages within conversations
-@bot.message_handler(func=lambda message: message.chat.id in user_states)
-def handle_conversation(message):
-    """Handle messages within a conversation state."""
-    chat_id = message.chat.id
-    state_info = user_states.get(chat_id)
-    
-    if not state_info:
-        return
-    
-    current_state = state_info["state"]
-    data = state_info["data"]
-    
-    # Admin conversation handling
-    if current_state == ConversationState.AWAITING_ADMIN_COMMAND:
-        handle_admin_conversation(message, data)
-        return
-    
-    # Regular user conversation handling
-    if current_state == ConversationState.AWAITING_NAME:
-        # Process name
-        name = message.text.strip()
-        data["name"] = name
-        
-        # Move to next state
-        state_info["state"] = ConversationState.AWAITING_EMAIL
-        
-        # Ask for email
-        bot.send_message(chat_id, MESSAGES["ask_email"].format(name=name))
-    
-    elif current_state == ConversationState.AWAITING_EMAIL:
-        # Process email
-        email = message.text.strip()
-        data["email"] = email
-        
-        # Move to next state
-        state_info["state"] = ConversationState.AWAITING_INTENTION
-        
-        # Ask for intention
-        bot.send_message(chat_id, MESSAGES["ask_intention"])
-    
-    elif current_state == ConversationState.AWAITING_INTENTION:
-        # Process intention
-        intention = message.text.strip()
-        data["intention"] = intention
-        
-        # Move to next state
-        state_info["state"] = ConversationState.AWAITING_INTERESTS
-        
-        # Ask for interests
-        bot.send_message(chat_id, MESSAGES["ask_interests"])
-    
-    elif current_state == ConversationState.AWAITING_INTERESTS:
-        # Process interests
-        keywords = message.text.strip()
-        data["keywords"] = keywords
-        
-        # If in update mode, update existing user
-        if data.get("update_mode"):
-            # Clear existing keywords and add new ones
-            # This would need to be implemented in the database class
-            user_id = data.get("user_id")
-            
-            # Send confirmation
-            bot.send_message(
-                chat_id,
-                f"✅ Seus interesses foram atualizados para: {keywords}"
-            )
-            
-            # Clear user state
-            del user_states[chat_id]
-            return
-        
-        # Regular registration flow
-        user_id = db.add_user(
-            str(chat_id),
-            data["name"],
-            data["email"],
-            data["intention"],
-            keywords
-        )
-        
-        if user_id:
-            # Send confirmation
-            bot.send_message(
-                chat_id,
-                MESSAGES["registration_complete"].format(
-                    name=data["name"],
-                    email=data["email"],
-                    intention=data["intention"],
-                    keywords=keywords
-                )
-            )
-        else:
-            # Registration failed
-            bot.send_message(
-                chat_id,
-                "❌ Ocorreu um erro ao salvar seus dados. Por favor, tente novamente mais tarde."
-            )
-        
-        # Clear user state
-        del user_states[chat_id]
+# Per-state conversation steps, dispatched through _HANDLERS below
+def _on_name(message, state_info):
+    """Record the user's name and ask for the email."""
+    name = message.text.strip()
+    state_info.name = name
 
-def handle_admin_conversation(message, data):
-    """Handle the admin conversation flow."""
+    # Move to next state
+    state_info.state = ConversationState.AWAITING_EMAIL
+
+    # Ask for email
+    bot.send_message(message.chat.id, MESSAGE_TEMPLATES["ask_email"].substitute(name=name))
+
+def _on_email(message, state_info):
+    """Record the user's email and ask for the intention."""
+    state_info.email = message.text.strip()
+
+    # Move to next state
+    state_info.state = ConversationState.AWAITING_INTENTION
+
+    # Ask for intention
+    bot.send_message(message.chat.id, MESSAGES["ask_intention"])
+
+def _on_intention(message, state_info):
+    """Record the user's intention and ask for the interests."""
+    state_info.intention = message.text.strip()
+
+    # Move to next state
+    state_info.state = ConversationState.AWAITING_INTERESTS
+
+    # Ask for interests
+    bot.send_message(message.chat.id, MESSAGES["ask_interests"])
+
+def _on_interests(message, state_info):
+    """Record the interests and finish the registration or update."""
     chat_id = message.chat.id
-    text = message.text
-    
-    # Process based on admin command text
-    if text == "📊 List Users":
-        handle_list_users(message)
-    
-    elif text == "🔍 Find User":
+    keywords = message.text.strip()
+
+    # If in update mode, update existing user
+    if state_info.update_mode:
+        # Clear existing keywords and add new ones
+        # This would need to be implemented in the database class
+        user_id = state_info.user_id
+
+        # Send confirmation
         bot.send_message(
             chat_id,
-            "Digite o ID do usuário ou nome que deseja encontrar:"
+            f"✅ Seus interesses foram atualizados para: {keywords}"
         )
-        # Could set a more specific state here for searching users
-    
-    elif text == "🗑️ Remove User":
+
+        # Clear user state
+        clear_state(chat_id)
+        return
+
+    # Regular registration flow
+    user_id = db.add_user(
+        str(chat_id),
+        state_info.name,
+        state_info.email,
+        state_info.intention,
+        keywords
+    )
+
+    if user_id:
+        # Send confirmation
         bot.send_message(
             chat_id,
-            "Digite o ID do usuário que deseja remover:"
+            MESSAGE_TEMPLATES["registration_complete"].substitute(
+                name=state_info.name,
+                email=state_info.email,
+                intention=state_info.intention,
+                keywords=keywords
+            )
         )
-        # Could set a more specific state here for removing users
-    
-    elif text == "💾 Backup Database":
-        handle_backup(message)
-    
-    elif text == "♻️ Restore Database":
-        handle_restore(message)
-    
-    elif text == "❌ Cancel":
-        # Clear state and send confirmation
-        del user_states[chat_id]
-        
-        # Remove keyboard
-        markup = types.ReplyKeyboardRemove()
+    else:
+        # Registration failed
         bot.send_message(
             chat_id,
-            "🔙 Saindo do modo de administração.",
-            reply_markup=markup
+            "❌ Ocorreu um erro ao salvar seus dados. Por favor, tente novamente mais tarde."
         )
-    
-    else:
-        # Check if it's a user ID for removal
-        if text.isdigit() or text.startswith("-") and text[1:].isdigit():
-            if db.remove_user(text):
-                bot.send_message(chat_id, MESSAGES["user_removed"])
-            else:
-                bot.send_message(chat_id, MESSAGES["user_not_found"])
+
+    # Clear user state
+    clear_state(chat_id)
+
+def _on_admin_command(message, state_info):
+    """Forward an admin-menu message to the admin conversation flow."""
+    handle_admin_conversation(message)
+
+# Jump table from conversation state to its step function: one dict lookup
+# on an integer key per message instead of walking an if/elif chain
+_HANDLERS = {
+    ConversationState.AWAITING_NAME: _on_name,
+    ConversationState.AWAITING_EMAIL: _on_email,
+    ConversationState.AWAITING_INTENTION: _on_intention,
+    ConversationState.AWAITING_INTERESTS: _on_interests,
+    ConversationState.AWAITING_ADMIN_COMMAND: _on_admin_command,
+}
+
+# Handle text messages within conversations. The keyword-only defaults
+# bind hot globals once at definition time, turning the per-message
+# LOAD_GLOBAL lookups into local accesses.
+@bot.message_handler(func=lambda message: has_state(message.chat.id))
+def handle_conversation(message, *, _get_state=get_state, _handlers=_HANDLERS):
+    """Handle messages within a conversation state."""
+    state_info = _get_state(message.chat.id)
+
+    if not state_info:
+        return
+
+    fn = _handlers.get(state_info.state)
+    if fn:
+        fn(message, state_info)
+
+def _prompt_find_user(message):
+    """Ask the admin for the user to search for."""
+    bot.send_message(
+        message.chat.id,
+        "Digite o ID do usuário ou nome que deseja encontrar:"
+    )
+    # Could set a more specific state here for searching users
+
+def _prompt_remove_user(message):
+    """Ask the admin for the user ID to remove."""
+    bot.send_message(
+        message.chat.id,
+        "Digite o ID do usuário que deseja remover:"
+    )
+    # Could set a more specific state here for removing users
+
+def _exit_admin_mode(message):
+    """Leave the admin conversation and remove the keyboard."""
+    chat_id = message.chat.id
+
+    # Clear state and send confirmation
+    clear_state(chat_id)
+
+    # Remove keyboard
+    markup = types.ReplyKeyboardRemove()
+    bot.send_message(
+        chat_id,
+        "🔙 Saindo do modo de administração.",
+        reply_markup=markup
+    )
+
+# Matches a chat ID (optionally negative, as group IDs are) in a single
+# C-level scan instead of the old three-pass isdigit/startswith check
+_INT_RE = re.compile(r'-?\d+\Z')
+
+# Button-label dispatch table: one dict lookup per admin message instead
+# of comparing against every emoji-prefixed label in turn
+_ADMIN_BUTTON_HANDLERS = {
+    "📊 List Users": handle_list_users,
+    "🔍 Find User": _prompt_find_user,
+    "🗑️ Remove User": _prompt_remove_user,
+    "💾 Backup Database": handle_backup,
+    "♻️ Restore Database": handle_restore,
+    "❌ Cancel": _exit_admin_mode,
+}
+
+def handle_admin_conversation(message, *, _M=MESSAGES, _bot=bot,
+                              _buttons=_ADMIN_BUTTON_HANDLERS):
+    """Handle the admin conversation flow."""
+    chat_id = message.chat.id
+    text = message.text
+
+    # Process based on admin command text
+    fn = _buttons.get(text)
+    if fn:
+        return fn(message)
+
+    # Check if it's a user ID for removal
+    if _INT_RE.match(text):
+        if db.remove_user(text):
+            _bot.send_message(chat_id, _M["user_removed"])
         else:
-            # Unknown admin command
-            bot.send_message(
-                chat_id, 
-                "Comando não reconhecido. Por favor, selecione uma opção do menu.",
-                reply_markup=get_admin_keyboard()
-            )
+            _bot.send_message(chat_id, _M["user_not_found"])
+    else:
+        # Unknown admin command
+        _bot.send_message(
+            chat_id,
+            "Comando não reconhecido. Por favor, selecione uma opção do menu.",
+            reply_markup=get_admin_keyboard()
+        )
 
 # Fallback handler for unrecognized messages
 @bot.message_handler(func=lambda message: True)
-def handle_unknown(message):
+def handle_unknown(message, *, _M=MESSAGES, _bot=bot):
     """Handle unrecognized messages."""
-    chat_id = message.chat.id
-    bot.send_message(chat_id, MESSAGES["command_not_found"])
-    send_help_message(chat_id)
+    # Stay quiet in groups; replying to every stray message there would
+    # burn API calls and spam the chat. The registered command menu
+    # already tells private-chat users what commands exist, so a single
+    # short reply replaces the old two-message answer.
+    if message.chat.type != 'private':
+        return
+    _bot.send_message(message.chat.id, _M["command_not_found"])
 
 # Function to send invite links to users
 def send_invite(chat_id, invite_link):
     """Send a group invitation link to a user."""
     try:
+        _send_bucket.acquire()
         bot.send_message(
             chat_id,
-            MESSAGES["group_invitation"].format(invite_link=invite_link)
+            MESSAGE_TEMPLATES["group_invitation"].substitute(invite_link=invite_link)
         )
         logger.info(f"Invite sent to chat_id {chat_id}")
         return True
@@ -574,29 +695,48 @@ def send_invite(chat_id, invite_link):
         logger.error(f"Error sending invite to chat_id {chat_id}: {e}")
         return False
 
+# Invite links are permanent, so each group only ever needs one API
+# round-trip; a plain dict (rather than lru_cache) keeps failed calls
+# uncached and allows per-group invalidation
+_invite_link_cache = {}
+_invite_link_lock = threading.Lock()
+
+def invalidate_invite_link(group_id):
+    """Drop the cached invite link for a group (e.g. after revocation)."""
+    with _invite_link_lock:
+        _invite_link_cache.pop(group_id, None)
+
 # Function to generate permanent invite links for groups
 def generate_invite_link(group_id):
-    """Generate a permanent invite link for a group."""
+    """Generate a permanent invite link for a group, caching the result."""
+    with _invite_link_lock:
+        invite_link = _invite_link_cache.get(group_id)
+    if invite_link:
+        return invite_link
+
     try:
         invite_link = bot.create_chat_invite_link(
             group_id, 
             expire_date=None,
             member_limit=None
         ).invite_link
-        
+
+        with _invite_link_lock:
+            _invite_link_cache[group_id] = invite_link
+
         logger.info(f"Generated invite link for group {group_id}: {invite_link}")
         return invite_link
     except Exception as e:
         logger.error(f"Error generating invite link for group {group_id}: {e}")
         return None
 
-# Function to send a tweet to a group
-def send_tweet_to_group(group_id, tweet_text, tweet_link):
-    """Send a tweet notification to a group."""
+def _do_send_tweet(group_id, tweet_text, tweet_link):
+    """Send a tweet notification to a group under the send rate limit."""
     try:
+        _send_bucket.acquire()
         bot.send_message(
             group_id,
-            MESSAGES["new_tweet"].format(
+            MESSAGE_TEMPLATES["new_tweet"].substitute(
                 tweet_text=tweet_text,
                 tweet_link=tweet_link
             ),
@@ -606,4 +746,12 @@ def send_tweet_to_group(group_id, tweet_text, tweet_link):
         return True
     except Exception as e:
         logger.error(f"Error sending tweet to group {group_id}: {e}")
-        return False
\ No newline at end of file
+        return False
+
+# Function to send a tweet to a group
+def send_tweet_to_group(group_id, tweet_text, tweet_link):
+    """
+    Queue a tweet notification to a group on the sender pool.
+    Returns a Future resolving to True on delivery.
+    """
+    return _send_executor.submit(_do_send_tweet, group_id, tweet_text, tweet_link)
\ No newline at end of file
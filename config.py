@@ -1,7 +1,9 @@
 import os
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import json
+import queue
+import string
 from dotenv import load_dotenv
 
 # Load environment variables from .env file if it exists
@@ -10,17 +12,23 @@ load_dotenv()
 # Bot configuration
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "YOUR_TOKEN_HERE")
 
-# Webhook settings
-WEBHOOK_URL = os.getenv("WEBHOOK_URL", "https://your-webhook-url.com/webhook")
+# Webhook settings. Leave WEBHOOK_URL empty to receive Telegram updates
+# via long polling instead of a webhook.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
 WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
 WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 5000))
 
+# Update types the bot actually handles; anything else is dropped by
+# Telegram instead of being delivered and decoded for nothing
+TELEGRAM_ALLOWED_UPDATES = ["message", "callback_query"]
+
 # Database settings
 DATABASE_FILE = os.getenv("DATABASE_FILE", "bot_database.db")
 BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
 
-# Admin settings
-ADMIN_IDS = json.loads(os.getenv("ADMIN_IDS", "[]"))  # List of admin chat IDs
+# Admin settings. Stored as a frozenset of strings so membership checks
+# are O(1) and int/str entries in the env var are both accepted.
+ADMIN_IDS = frozenset(str(x) for x in json.loads(os.getenv("ADMIN_IDS", "[]")))
 
 # Performance settings
 DB_POLL_INTERVAL = int(os.getenv("DB_POLL_INTERVAL", 60))  # Seconds
@@ -46,23 +54,36 @@ MESSAGES = {
     "user_not_found": "❌ Usuário não encontrado.",
 }
 
+# Precompiled templates for the messages that carry placeholders, so the
+# format string is tokenized once at import instead of on every send
+MESSAGE_TEMPLATES = {
+    key: string.Template(text.replace("{", "${"))
+    for key, text in MESSAGES.items()
+    if "{" in text
+}
+
+# Background listener that owns the real log handlers
+_log_listener = None
+
 # Setup logging
 def setup_logging():
     """Configure logging for the application."""
+    global _log_listener
+
     # Ensure logs directory exists
     if not os.path.exists("logs"):
         os.makedirs("logs")
-    
+
     # Configure root logger
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
-    
+
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     console_handler.setFormatter(console_format)
-    
+
     # File handler - with rotation
     file_handler = RotatingFileHandler(
         "logs/bot.log", maxBytes=10*1024*1024, backupCount=5
@@ -70,13 +91,27 @@ def setup_logging():
     file_handler.setLevel(logging.INFO)
     file_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     file_handler.setFormatter(file_format)
-    
-    # Add handlers
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    
+
+    # The root logger only enqueues records; a background listener thread
+    # owns the console and file handlers, so handler I/O (disk writes,
+    # log rotation) never blocks the thread that emitted the record
+    log_queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+
+    _log_listener = QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _log_listener.start()
+
     # Set higher log level for some verbose libraries
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("telebot").setLevel(logging.WARNING)
-    
-    return logger
\ No newline at end of file
+
+    return logger
+
+def stop_logging():
+    """Stop the background logging listener, flushing queued records."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
\ No newline at end of file
@@ -1,16 +1,43 @@
 import sqlite3
+import functools
+import heapq
 import os
 import json
+import re
 import time
 import logging
-import shutil
+from collections import OrderedDict
 from datetime import datetime
 from contextlib import contextmanager
-from threading import Lock
+from threading import Lock, local
+
+# Optional: C-accelerated multi-pattern matching for keyword lookups;
+# the FTS5 query path covers installs without it
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Word tokens for FTS matching, roughly mirroring unicode61 tokenization
+_WORD_RE = re.compile(r'\w+')
+
+def _contains_phrase(text, phrase):
+    """Check for a whole-word occurrence of a phrase in lowercased text."""
+    start = text.find(phrase)
+    while start != -1:
+        end = start + len(phrase)
+        if ((start == 0 or not text[start - 1].isalnum())
+                and (end == len(text) or not text[end].isalnum())):
+            return True
+        start = text.find(phrase, start + 1)
+    return False
+
+# Upper bound on the in-memory processed-tweet LRU
+TWEET_CACHE_SIZE = 10000
+
 class Database:
     """
     Database manager for the Telegram bot.
@@ -25,8 +52,8 @@ class Database:
         name TEXT NOT NULL,
         email TEXT NOT NULL,
         intention TEXT NOT NULL,
-        created_at TEXT NOT NULL,
-        updated_at TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now')),
+        updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now')),
         group_id TEXT,
         group_name TEXT,
         invite_link TEXT
@@ -38,8 +65,8 @@ class Database:
         group_id TEXT NOT NULL UNIQUE,
         group_name TEXT,
         invite_link TEXT,
-        created_at TEXT NOT NULL,
-        updated_at TEXT NOT NULL
+        created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now')),
+        updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now'))
     );"""
     
     SQL_CREATE_KEYWORDS_TABLE = """
@@ -47,7 +74,7 @@ class Database:
         id INTEGER PRIMARY KEY,
         user_id INTEGER NOT NULL,
         keyword TEXT NOT NULL,
-        created_at TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now')),
         FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
         UNIQUE(user_id, keyword)
     );"""
@@ -56,40 +83,152 @@ class Database:
     CREATE TABLE IF NOT EXISTS admins (
         id INTEGER PRIMARY KEY,
         user_id TEXT NOT NULL UNIQUE,
-        added_at TEXT NOT NULL
+        added_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now'))
     );"""
     
+    # Full-text index over keywords so tweet matching is a single indexed
+    # MATCH query instead of a Python scan over every distinct keyword
+    SQL_CREATE_KEYWORDS_FTS = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS keywords_fts
+    USING fts5(keyword, user_id UNINDEXED, tokenize='unicode61');"""
+
+    SQL_CREATE_KEYWORDS_FTS_TRIGGERS = [
+        """CREATE TRIGGER IF NOT EXISTS keywords_fts_insert
+           AFTER INSERT ON keywords BEGIN
+               INSERT INTO keywords_fts (rowid, keyword, user_id)
+               VALUES (new.id, new.keyword, new.user_id);
+           END;""",
+        """CREATE TRIGGER IF NOT EXISTS keywords_fts_delete
+           AFTER DELETE ON keywords BEGIN
+               DELETE FROM keywords_fts WHERE rowid = old.id;
+           END;""",
+    ]
+
     SQL_CREATE_TWEETS_TABLE = """
     CREATE TABLE IF NOT EXISTS tweets (
         id INTEGER PRIMARY KEY,
         tweet_id TEXT UNIQUE,
         tweet_text TEXT NOT NULL,
         tweet_link TEXT NOT NULL,
-        processed_at TEXT NOT NULL
+        processed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f','now'))
     );"""
     
+    # Database files whose schema has already been set up this process
+    _initialized_files = set()
+
     def __init__(self, db_file="bot_database.db"):
         """Initialize the database manager."""
         self.db_file = db_file
-        self.connection = None
-        self.db_lock = Lock()  # Lock for thread safety
+        # Long-lived connections: one reader per thread plus a single
+        # shared writer (SQLite allows only one writer at a time), so the
+        # hot path stops paying connect/PRAGMA/page-cache warm-up per call
+        self._local = local()
+        self._write_lock = Lock()
+        self._write_conn = None
+        # Bumped when the database file is swapped out (restore) so cached
+        # connections in other threads know to reopen
+        self._generation = 0
+        # WAL lets readers and the single writer run concurrently, so the
+        # lock only has to serialize the backup/restore file copies
+        self.db_lock = Lock()
+        # Recently seen tweet IDs, checked before hitting SQL; bounded so
+        # a long-running process doesn't accumulate every tweet ever seen
+        self._tweet_cache = OrderedDict()
+        self._tweet_cache_lock = Lock()
+        # Callbacks fired after group rows change, so interested parties
+        # (the group monitor) can react without polling; registered from
+        # outside to avoid importing them here
+        self._group_listeners = []
+        # Callbacks fired after a restore so holders of independent
+        # connections (e.g. the /stats reader) can reopen them
+        self._restore_listeners = []
+        # Aho-Corasick automaton over all keywords, built lazily and
+        # rebuilt only after the keywords table changes
+        self._ac_automaton = None
+        self._ac_dirty = True
+        self._ac_lock = Lock()
         self.init_db()
-    
-    @contextmanager
-    def get_connection(self):
-        """Context manager for database connections."""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_file)
-            conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+
+    def register_group_listener(self, callback):
+        """Register a callback invoked whenever a group row changes."""
+        self._group_listeners.append(callback)
+
+    def _notify_group_change(self):
+        """Fire the registered group-change callbacks."""
+        for callback in self._group_listeners:
             try:
-                yield conn
-            finally:
-                conn.close()
-    
+                callback()
+            except Exception as e:
+                logger.error(f"Error in group-change listener: {e}")
+
+    def register_restore_listener(self, callback):
+        """Register a callback invoked after a database restore."""
+        self._restore_listeners.append(callback)
+
+    def _notify_restore(self):
+        """Fire the registered restore callbacks."""
+        for callback in self._restore_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in restore listener: {e}")
+
+    def _configure_connection(self, conn):
+        """Apply the per-connection PRAGMA tuning."""
+        # Wait out a busy writer instead of failing immediately
+        conn.execute("PRAGMA busy_timeout=5000")
+        # WAL tolerates NORMAL: a crash can lose the last transactions but
+        # cannot corrupt the database, and it skips one fsync per commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-8000")
+        conn.execute("PRAGMA foreign_keys=ON")
+
+    def _new_connection(self):
+        """Open and configure a connection to the database file."""
+        # All queries use fixed SQL shapes with bound parameters (the FTS
+        # match expression and the matched-user ID list each travel as a
+        # single bound string), so a larger statement cache keeps every
+        # hot statement compiled
+        conn = sqlite3.connect(
+            self.db_file, check_same_thread=False, cached_statements=128
+        )
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        self._configure_connection(conn)
+        return conn
+
+    @contextmanager
+    def get_read_connection(self):
+        """Context manager yielding this thread's cached reader connection."""
+        if getattr(self._local, 'generation', None) != self._generation:
+            old_conn = getattr(self._local, 'conn', None)
+            if old_conn is not None:
+                old_conn.close()
+            self._local.conn = self._new_connection()
+            self._local.generation = self._generation
+        yield self._local.conn
+
+    @contextmanager
+    def get_write_connection(self):
+        """Context manager yielding the shared writer connection."""
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self._new_connection()
+            yield self._write_conn
+
     def init_db(self):
         """Initialize the database tables if they don't exist."""
-        with self.get_connection() as conn:
+        # Schema setup only needs to happen once per database file, even
+        # if a caller bypasses the module-level singleton below
+        if self.db_file in Database._initialized_files:
+            return
+
+        with self.get_write_connection() as conn:
             cursor = conn.cursor()
+
+            # WAL journal mode is persistent, so setting it once here
+            # covers every later connection; writers stop blocking readers
+            cursor.execute("PRAGMA journal_mode=WAL")
             # Create tables
             cursor.execute(self.SQL_CREATE_USERS_TABLE)
             cursor.execute(self.SQL_CREATE_GROUPS_TABLE)
@@ -99,27 +238,63 @@ class Database:
             
             # Create index for faster keyword searches
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_keywords_keyword ON keywords(keyword);")
+
+            # Partial index so the active-users count is an index-only scan
+            cursor.execute(
+                """CREATE INDEX IF NOT EXISTS idx_users_group_id
+                   ON users(group_id) WHERE group_id IS NOT NULL;"""
+            )
+
+            # Covering indexes for the webhook hot-path lookups: the
+            # keywords FK join, the unassigned-user pick, and admin checks
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_keywords_user_id ON keywords(user_id);"
+            )
+            cursor.execute(
+                """CREATE INDEX IF NOT EXISTS idx_users_group_null
+                   ON users(group_id) WHERE group_id IS NULL OR group_id = '';"""
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_admins_user_id ON admins(user_id);"
+            )
+
+            # Full-text keyword index, kept in sync by triggers
+            cursor.execute(self.SQL_CREATE_KEYWORDS_FTS)
+            for trigger_sql in self.SQL_CREATE_KEYWORDS_FTS_TRIGGERS:
+                cursor.execute(trigger_sql)
+
+            # Backfill keywords created before the FTS table existed
+            cursor.execute(
+                """INSERT INTO keywords_fts (rowid, keyword, user_id)
+                   SELECT id, keyword, user_id FROM keywords
+                   WHERE id NOT IN (SELECT rowid FROM keywords_fts)"""
+            )
+
+            # Refresh planner statistics so the new indexes get picked
+            cursor.execute("ANALYZE")
             conn.commit()
-            
-            # Add default admin if needed (adjust with your admin's user ID)
-            self.add_admin_if_not_exists("YOUR_ADMIN_ID")
-            
-            logger.info("Database initialized successfully")
+
+        # Add default admin if needed (adjust with your admin's user ID).
+        # Runs outside the block above: the writer lock is not reentrant.
+        self.add_admin_if_not_exists("YOUR_ADMIN_ID")
+
+        Database._initialized_files.add(self.db_file)
+        logger.info("Database initialized successfully")
     
     def add_admin_if_not_exists(self, admin_id):
         """Add a default admin if no admins exist."""
-        with self.get_connection() as conn:
+        with self.get_write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM admins")
             count = cursor.fetchone()[0]
             
             if count == 0 and admin_id != "YOUR_ADMIN_ID":
-                now = datetime.now().isoformat()
                 cursor.execute(
-                    "INSERT INTO admins (user_id, added_at) VALUES (?, ?)",
-                    (admin_id, now)
+                    "INSERT INTO admins (user_id) VALUES (?)",
+                    (admin_id,)
                 )
                 conn.commit()
+                self.is_admin.cache_clear()
                 logger.info(f"Added default admin: {admin_id}")
     
     def backup_database(self):
@@ -127,22 +302,28 @@ class Database:
         try:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_dir = "backups"
-            
-            # Create backup directory if it doesn't exist
-            if not os.path.exists(backup_dir):
-                os.makedirs(backup_dir)
-            
+            os.makedirs(backup_dir, exist_ok=True)
+
             backup_file = f"{backup_dir}/backup_{timestamp}.db"
-            
-            # Ensure the database is not being written to during backup
+
+            # SQLite's online backup API snapshots a consistent state,
+            # including pages still sitting in the WAL, which a plain
+            # file copy of a WAL-mode database would miss
             with self.db_lock:
-                shutil.copy2(self.db_file, backup_file)
-            
-            # Remove old backups (keep only last 5)
-            backups = sorted([f for f in os.listdir(backup_dir) if f.startswith("backup_")])
-            if len(backups) > 5:
-                for old_backup in backups[:-5]:
-                    os.remove(f"{backup_dir}/{old_backup}")
+                dest = sqlite3.connect(backup_file)
+                try:
+                    with self.get_read_connection() as conn:
+                        conn.backup(dest)
+                finally:
+                    dest.close()
+
+            # Remove old backups (keep only last 5); nsmallest picks the
+            # victims without sorting the whole listing
+            entries = [e for e in os.scandir(backup_dir) if e.name.startswith("backup_")]
+            if len(entries) > 5:
+                victims = heapq.nsmallest(len(entries) - 5, entries, key=lambda e: e.name)
+                for old_backup in victims:
+                    os.remove(old_backup.path)
             
             logger.info(f"Database backed up successfully to {backup_file}")
             return backup_file
@@ -157,10 +338,25 @@ class Database:
                 logger.error(f"Backup file not found: {backup_file}")
                 return False
             
-            # Ensure the database is not being accessed during restore
+            # Copy the backup into the live database through the writer
+            # connection: replacing the file on disk would strand every
+            # open connection on deleted WAL sidecars, whereas the backup
+            # API swaps the content under SQLite's own locking
             with self.db_lock:
-                shutil.copy2(backup_file, self.db_file)
-            
+                source = sqlite3.connect(backup_file)
+                try:
+                    with self.get_write_connection() as conn:
+                        source.backup(conn)
+                finally:
+                    source.close()
+
+                # Per-thread readers stay valid, but reopening them drops
+                # any state tied to the pre-restore content
+                self._generation += 1
+
+            self._invalidate_keyword_automaton()
+            # Outside the locks: listeners may open their own connections
+            self._notify_restore()
             logger.info(f"Database restored successfully from {backup_file}")
             return True
         except Exception as e:
@@ -171,62 +367,78 @@ class Database:
     def add_user(self, chat_id, name, email, intention, keywords):
         """Add a new user with their interests."""
         try:
-            now = datetime.now().isoformat()
-            
-            with self.get_connection() as conn:
+            with self.get_write_connection() as conn:
                 cursor = conn.cursor()
-                
-                # Insert user
+
+                # Insert user; OR IGNORE turns the duplicate chat_id case
+                # into a rowcount check instead of an unwound exception.
+                # Timestamps come from the columns' strftime defaults.
                 cursor.execute(
-                    """INSERT INTO users 
-                       (chat_id, name, email, intention, created_at, updated_at) 
-                       VALUES (?, ?, ?, ?, ?, ?)""",
-                    (chat_id, name, email, intention, now, now)
+                    """INSERT OR IGNORE INTO users
+                       (chat_id, name, email, intention)
+                       VALUES (?, ?, ?, ?)""",
+                    (chat_id, name, email, intention)
                 )
-                
+
+                if cursor.rowcount == 0:
+                    logger.warning(f"User with chat_id {chat_id} already exists")
+                    return None
+
                 user_id = cursor.lastrowid
-                
-                # Insert keywords
-                keyword_list = [k.strip() for k in keywords.split(",") if k.strip()]
-                for keyword in keyword_list:
-                    cursor.execute(
-                        "INSERT INTO keywords (user_id, keyword, created_at) VALUES (?, ?, ?)",
-                        (user_id, keyword.lower(), now)
-                    )
-                
+
+                # Insert keywords in one prepared statement stepped per
+                # row, inside the same transaction as the user insert;
+                # OR IGNORE drops duplicates within the submitted list
+                keyword_rows = [
+                    (user_id, k.strip().lower())
+                    for k in keywords.split(",") if k.strip()
+                ]
+                cursor.executemany(
+                    "INSERT OR IGNORE INTO keywords (user_id, keyword) VALUES (?, ?)",
+                    keyword_rows
+                )
+
                 conn.commit()
+
+                self._invalidate_keyword_automaton()
                 logger.info(f"Added new user: {name} (ID: {user_id})")
                 return user_id
-        except sqlite3.IntegrityError:
-            logger.warning(f"User with chat_id {chat_id} already exists")
-            return None
         except Exception as e:
             logger.error(f"Error adding user: {e}")
             return None
     
+    @staticmethod
+    def _user_from_row(row):
+        """Turn a user row carrying a keyword_csv column into a dict."""
+        user = dict(row)
+        keyword_csv = user.pop('keyword_csv')
+        # Keywords are comma-split at insert, so ',' is a safe separator
+        user['keywords'] = keyword_csv.split(',') if keyword_csv else []
+        return user
+
     def get_user_by_chat_id(self, chat_id):
         """Get user information by chat ID."""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users WHERE chat_id = ?", (chat_id,))
+            # One query: the keywords arrive aggregated alongside the user
+            cursor.execute(
+                """SELECT u.*, GROUP_CONCAT(k.keyword) AS keyword_csv
+                   FROM users u LEFT JOIN keywords k ON k.user_id = u.id
+                   WHERE u.chat_id = ?
+                   GROUP BY u.id""",
+                (chat_id,)
+            )
             user = cursor.fetchone()
-            
+
             if user:
-                # Get user's keywords
-                cursor.execute("SELECT keyword FROM keywords WHERE user_id = ?", (user['id'],))
-                keywords = [row['keyword'] for row in cursor.fetchall()]
-                
-                # Convert to dict and add keywords
-                user_dict = dict(user)
-                user_dict['keywords'] = keywords
-                return user_dict
-            
+                return self._user_from_row(user)
+
             return None
     
     def remove_user(self, chat_id):
         """Remove a user and their keywords."""
         try:
-            with self.get_connection() as conn:
+            with self.get_write_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Get user ID first
@@ -239,87 +451,202 @@ class Database:
                 # Delete user and related keywords (cascading should handle this)
                 cursor.execute("DELETE FROM users WHERE chat_id = ?", (chat_id,))
                 conn.commit()
-                
+
+                self._invalidate_keyword_automaton()
                 logger.info(f"Removed user with chat_id: {chat_id}")
                 return True
         except Exception as e:
             logger.error(f"Error removing user: {e}")
             return False
     
-    def list_users(self, with_keywords=False):
-        """List all users, optionally with their keywords."""
-        with self.get_connection() as conn:
+    def search_users(self, term):
+        """Search users by name, email or chat ID."""
+        term_lower = term.lower()
+        # Escape LIKE wildcards so the term matches literally; '%' and
+        # especially '_' are common in emails and handles
+        escaped = (term_lower.replace('\\', '\\\\')
+                   .replace('%', '\\%').replace('_', '\\_'))
+        pattern = f"%{escaped}%"
+
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM users ORDER BY created_at DESC")
+            cursor.execute(
+                """SELECT * FROM users
+                   WHERE lower(name) LIKE ? ESCAPE '\\'
+                   OR lower(email) LIKE ? ESCAPE '\\'
+                   OR chat_id = ?
+                   ORDER BY created_at DESC""",
+                (pattern, pattern, term)
+            )
             users = [dict(row) for row in cursor.fetchall()]
-            
-            if with_keywords:
-                for user in users:
-                    cursor.execute("SELECT keyword FROM keywords WHERE user_id = ?", (user['id'],))
-                    user['keywords'] = [row['keyword'] for row in cursor.fetchall()]
-            
+
+            # Fetch keywords for the matched users only
+            for user in users:
+                cursor.execute("SELECT keyword FROM keywords WHERE user_id = ?", (user['id'],))
+                user['keywords'] = [row['keyword'] for row in cursor.fetchall()]
+
             return users
-    
+
+    def iter_users(self, with_keywords=False, batch_size=1000):
+        """Iterate over all users without loading the whole table into memory."""
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+
+            if with_keywords:
+                # Single aggregated query instead of one keyword SELECT
+                # per user; fetchmany still batches the grouped rows
+                cursor.execute(
+                    """SELECT u.*, GROUP_CONCAT(k.keyword) AS keyword_csv
+                       FROM users u LEFT JOIN keywords k ON k.user_id = u.id
+                       GROUP BY u.id ORDER BY u.created_at DESC"""
+                )
+                row_to_user = self._user_from_row
+            else:
+                cursor.execute("SELECT * FROM users ORDER BY created_at DESC")
+                row_to_user = dict
+
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+
+                for row in rows:
+                    yield row_to_user(row)
+
+    def count_users(self):
+        """Count registered users."""
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users")
+            return cursor.fetchone()[0]
+
+    def iter_chat_ids(self, batch_size=1000):
+        """Iterate over all user chat IDs without loading full rows."""
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT chat_id FROM users")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row['chat_id']
+
     def update_user_group(self, chat_id, group_id, group_name, invite_link):
         """Update user's assigned group."""
-        now = datetime.now().isoformat()
-        
-        with self.get_connection() as conn:
+        with self.get_write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                """UPDATE users SET 
-                   group_id = ?, group_name = ?, invite_link = ?, updated_at = ? 
+                """UPDATE users SET
+                   group_id = ?, group_name = ?, invite_link = ?,
+                   updated_at = strftime('%Y-%m-%dT%H:%M:%f','now')
                    WHERE chat_id = ?""",
-                (group_id, group_name, invite_link, now, chat_id)
+                (group_id, group_name, invite_link, chat_id)
             )
             conn.commit()
-            
+
             return cursor.rowcount > 0
-    
+
+    def assign_group_to_next_user(self, group_id, invite_link):
+        """Claim the longest-waiting unassigned user for a group.
+
+        Assigns the user, names the group after them and updates both
+        tables in one transaction. Returns a (user, group_name) pair,
+        or (None, None) when every user already has a group.
+        """
+        with self.get_write_connection() as conn:
+            cursor = conn.cursor()
+
+            # RETURNING folds the user fetch, the assignment and the
+            # keyword read into a single statement (SQLite >= 3.35)
+            cursor.execute(
+                """UPDATE users SET
+                   group_id = ?, invite_link = ?,
+                   updated_at = strftime('%Y-%m-%dT%H:%M:%f','now')
+                   WHERE id = (SELECT id FROM users
+                               WHERE group_id IS NULL OR group_id = ''
+                               ORDER BY created_at ASC LIMIT 1)
+                   RETURNING id, chat_id, name,
+                             (SELECT GROUP_CONCAT(keyword) FROM keywords k
+                              WHERE k.user_id = users.id) AS keyword_csv""",
+                (group_id, invite_link)
+            )
+            row = cursor.fetchone()
+
+            if row is None:
+                conn.commit()
+                return None, None
+
+            # The group is named after the user it was claimed for, so
+            # the name can only be built once the user is known
+            keywords = [kw for kw in (row['keyword_csv'] or '').split(',') if kw]
+            group_name = f"Grupo de {row['name']} - {', '.join(keywords[:3]) if keywords else 'Geral'}"
+
+            cursor.execute(
+                "UPDATE users SET group_name = ? WHERE id = ?",
+                (group_name, row['id'])
+            )
+            cursor.execute(
+                """UPDATE groups SET
+                   group_name = ?, invite_link = ?,
+                   updated_at = strftime('%Y-%m-%dT%H:%M:%f','now')
+                   WHERE group_id = ?""",
+                (group_name, invite_link, group_id)
+            )
+            conn.commit()
+
+        user = {'chat_id': row['chat_id'], 'name': row['name'], 'keywords': keywords}
+        return user, group_name
+
     # Group operations
     def add_group(self, group_id, group_name=None, invite_link=None):
         """Add a new group."""
         try:
-            now = datetime.now().isoformat()
-            
-            with self.get_connection() as conn:
+            with self.get_write_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    """INSERT INTO groups 
-                       (group_id, group_name, invite_link, created_at, updated_at) 
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (group_id, group_name, invite_link, now, now)
+                    """INSERT OR IGNORE INTO groups
+                       (group_id, group_name, invite_link)
+                       VALUES (?, ?, ?)""",
+                    (group_id, group_name, invite_link)
                 )
                 conn.commit()
-                
-                logger.info(f"Added new group: {group_id}")
-                return cursor.lastrowid
-        except sqlite3.IntegrityError:
-            logger.warning(f"Group with ID {group_id} already exists")
-            return None
+
+                if cursor.rowcount == 0:
+                    logger.warning(f"Group with ID {group_id} already exists")
+                    return None
+
+                group_rowid = cursor.lastrowid
+
+            # Notify outside the writer lock; listeners may hit the DB
+            logger.info(f"Added new group: {group_id}")
+            self._notify_group_change()
+            return group_rowid
         except Exception as e:
             logger.error(f"Error adding group: {e}")
             return None
     
     def update_group(self, group_id, group_name, invite_link):
         """Update group information."""
-        now = datetime.now().isoformat()
-        
-        with self.get_connection() as conn:
+        with self.get_write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                """UPDATE groups SET 
-                   group_name = ?, invite_link = ?, updated_at = ? 
+                """UPDATE groups SET
+                   group_name = ?, invite_link = ?,
+                   updated_at = strftime('%Y-%m-%dT%H:%M:%f','now')
                    WHERE group_id = ?""",
-                (group_name, invite_link, now, group_id)
+                (group_name, invite_link, group_id)
             )
             conn.commit()
-            
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+
+        if updated:
+            self._notify_group_change()
+        return updated
     
     def get_incomplete_groups(self):
         """Get groups that need to be completed with information."""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """SELECT * FROM groups 
@@ -330,29 +657,28 @@ class Database:
     
     def get_user_without_group(self):
         """Get a user who hasn't been assigned a group yet."""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                """SELECT * FROM users 
-                   WHERE group_id IS NULL OR group_id = '' 
-                   ORDER BY created_at ASC LIMIT 1"""
+                """SELECT u.*, GROUP_CONCAT(k.keyword) AS keyword_csv
+                   FROM users u LEFT JOIN keywords k ON k.user_id = u.id
+                   WHERE u.group_id IS NULL OR u.group_id = ''
+                   GROUP BY u.id ORDER BY u.created_at ASC LIMIT 1"""
             )
             user = cursor.fetchone()
-            
+
             if user:
-                cursor.execute("SELECT keyword FROM keywords WHERE user_id = ?", (user['id'],))
-                keywords = [row['keyword'] for row in cursor.fetchall()]
-                
-                user_dict = dict(user)
-                user_dict['keywords'] = keywords
-                return user_dict
-            
+                return self._user_from_row(user)
+
             return None
     
-    # Admin operations
+    # Admin operations. The admin set changes rarely compared to how
+    # often handlers ask about it, so the lookup is memoized and the
+    # cache is flushed whenever the admins table is mutated.
+    @functools.lru_cache(maxsize=256)
     def is_admin(self, user_id):
         """Check if a user is an admin."""
-        with self.get_connection() as conn:
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT id FROM admins WHERE user_id = ?", (user_id,))
             return cursor.fetchone() is not None
@@ -360,90 +686,214 @@ class Database:
     def add_admin(self, user_id):
         """Add a new admin."""
         try:
-            now = datetime.now().isoformat()
-            
-            with self.get_connection() as conn:
+            with self.get_write_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "INSERT INTO admins (user_id, added_at) VALUES (?, ?)",
-                    (user_id, now)
+                    "INSERT OR IGNORE INTO admins (user_id) VALUES (?)",
+                    (user_id,)
                 )
                 conn.commit()
-                
+
+                if cursor.rowcount == 0:
+                    logger.warning(f"Admin with user_id {user_id} already exists")
+                    return False
+
+                self.is_admin.cache_clear()
                 logger.info(f"Added new admin: {user_id}")
                 return True
-        except sqlite3.IntegrityError:
-            logger.warning(f"Admin with user_id {user_id} already exists")
-            return False
         except Exception as e:
             logger.error(f"Error adding admin: {e}")
             return False
     
     def remove_admin(self, user_id):
         """Remove an admin."""
-        with self.get_connection() as conn:
+        with self.get_write_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("DELETE FROM admins WHERE user_id = ?", (user_id,))
             conn.commit()
-            
+
+            self.is_admin.cache_clear()
             return cursor.rowcount > 0
     
     # Tweet operations
     def add_tweet(self, tweet_id, tweet_text, tweet_link):
         """Add a processed tweet to avoid duplicates."""
         try:
-            now = datetime.now().isoformat()
-            
-            with self.get_connection() as conn:
+            with self.get_write_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    """INSERT INTO tweets 
-                       (tweet_id, tweet_text, tweet_link, processed_at) 
-                       VALUES (?, ?, ?, ?)""",
-                    (tweet_id, tweet_text, tweet_link, now)
+                    """INSERT OR IGNORE INTO tweets
+                       (tweet_id, tweet_text, tweet_link)
+                       VALUES (?, ?, ?)""",
+                    (tweet_id, tweet_text, tweet_link)
                 )
                 conn.commit()
-                return True
-        except sqlite3.IntegrityError:
-            # Tweet already processed
-            return False
+
+                # rowcount 0 means the tweet was already processed; either
+                # way the ID is worth remembering
+                self._remember_tweet(tweet_id)
+                return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Error adding tweet: {e}")
             return False
     
+    def _remember_tweet(self, tweet_id):
+        """Record a tweet ID in the bounded in-memory LRU."""
+        with self._tweet_cache_lock:
+            self._tweet_cache[tweet_id] = True
+            self._tweet_cache.move_to_end(tweet_id)
+            while len(self._tweet_cache) > TWEET_CACHE_SIZE:
+                self._tweet_cache.popitem(last=False)
+
     def is_tweet_processed(self, tweet_id):
         """Check if a tweet has already been processed."""
-        with self.get_connection() as conn:
+        # Recently seen tweets resolve from memory without touching SQL
+        with self._tweet_cache_lock:
+            if tweet_id in self._tweet_cache:
+                return True
+
+        with self.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT id FROM tweets WHERE tweet_id = ?", (tweet_id,))
-            return cursor.fetchone() is not None
+            processed = cursor.fetchone() is not None
+
+        if processed:
+            self._remember_tweet(tweet_id)
+        return processed
     
+    def process_tweet(self, tweet_id, tweet_text, tweet_link):
+        """Record a tweet and find its matching users in one transaction.
+
+        Returns a (already_processed, users) pair; users is empty when
+        the tweet had been seen before.
+        """
+        # Recently seen tweets never touch the database at all
+        with self._tweet_cache_lock:
+            if tweet_id in self._tweet_cache:
+                return True, []
+
+        with self.get_write_connection() as conn:
+            cursor = conn.cursor()
+
+            # The upsert doubles as the dedupe check: rowcount 0 means an
+            # earlier delivery of the same tweet won the race
+            cursor.execute(
+                """INSERT OR IGNORE INTO tweets
+                   (tweet_id, tweet_text, tweet_link)
+                   VALUES (?, ?, ?)""",
+                (tweet_id, tweet_text, tweet_link)
+            )
+            already_processed = cursor.rowcount == 0
+            conn.commit()
+
+        self._remember_tweet(tweet_id)
+
+        # Matching runs outside the writer lock on the automaton/read path
+        users = [] if already_processed else self.find_users_by_keywords(tweet_text)
+        return already_processed, users
+
+    def _invalidate_keyword_automaton(self):
+        """Mark the in-memory keyword automaton for rebuild."""
+        with self._ac_lock:
+            self._ac_dirty = True
+
+    def _get_keyword_automaton(self):
+        """Return the keyword automaton, rebuilding it when stale."""
+        with self._ac_lock:
+            if self._ac_dirty:
+                # One user-ID set per distinct keyword
+                keyword_users = {}
+                with self.get_read_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT keyword, user_id FROM keywords")
+                    for row in cursor.fetchall():
+                        keyword_users.setdefault(row['keyword'], set()).add(row['user_id'])
+
+                if keyword_users:
+                    automaton = ahocorasick.Automaton()
+                    for keyword, user_ids in keyword_users.items():
+                        # Keyword length travels with the match so the
+                        # caller can check word boundaries cheaply
+                        automaton.add_word(keyword, (len(keyword), user_ids))
+                    automaton.make_automaton()
+                else:
+                    automaton = None
+
+                self._ac_automaton = automaton
+                self._ac_dirty = False
+
+            return self._ac_automaton
+
     def find_users_by_keywords(self, tweet_text):
         """Find users whose keywords match the tweet text."""
         tweet_text_lower = tweet_text.lower()
-        
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get all keywords first (optimization to avoid checking each user)
-            cursor.execute("SELECT DISTINCT keyword FROM keywords")
-            all_keywords = [row['keyword'] for row in cursor.fetchall()]
-            
-            # Find matching keywords in the tweet
-            matching_keywords = [kw for kw in all_keywords if kw in tweet_text_lower]
-            
-            if not matching_keywords:
+
+        # Preferred path: a single in-memory pass over the tweet finds
+        # every keyword occurrence at once; boundary checks keep the
+        # semantics aligned with the whole-word FTS fallback below
+        if ahocorasick is not None:
+            automaton = self._get_keyword_automaton()
+            if automaton is None:
                 return []
-            
-            # Get users who have these keywords
-            placeholders = ','.join(['?'] * len(matching_keywords))
+
+            user_ids = set()
+            for end_index, (length, matched_ids) in automaton.iter(tweet_text_lower):
+                start_index = end_index - length + 1
+                if start_index > 0 and tweet_text_lower[start_index - 1].isalnum():
+                    continue
+                if (end_index + 1 < len(tweet_text_lower)
+                        and tweet_text_lower[end_index + 1].isalnum()):
+                    continue
+                user_ids |= matched_ids
+
+            if not user_ids:
+                return []
+
+            # The matched IDs travel as one bound JSON array so the query
+            # keeps a single shape no matter how many users matched,
+            # staying inside the sized statement cache
+            with self.get_read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """SELECT * FROM users
+                       WHERE id IN (SELECT value FROM json_each(?))
+                       AND group_id IS NOT NULL AND group_id != ''""",
+                    (json.dumps(sorted(user_ids)),)
+                )
+                return [dict(row) for row in cursor.fetchall()]
+
+        # Fallback: tokenize the tweet once and let the FTS index narrow
+        # the candidates; quoting each token makes it a literal MATCH
+        # term. A multi-word keyword matches the OR expression on any one
+        # of its words, so each candidate keyword is verified against the
+        # tweet as a whole phrase before its user is notified.
+        tokens = set(_WORD_RE.findall(tweet_text_lower))
+        if not tokens:
+            return []
+
+        match_expr = " OR ".join(f'"{token}"' for token in tokens)
+
+        with self.get_read_connection() as conn:
+            cursor = conn.cursor()
             cursor.execute(
-                f"""SELECT DISTINCT u.* FROM users u
-                   JOIN keywords k ON u.id = k.user_id
-                   WHERE k.keyword IN ({placeholders})
+                """SELECT u.*, f.keyword AS matched_keyword FROM users u
+                   JOIN keywords_fts f ON u.id = f.user_id
+                   WHERE keywords_fts MATCH ?
                    AND u.group_id IS NOT NULL AND u.group_id != ''""",
-                matching_keywords
+                (match_expr,)
             )
-            
-            matching_users = [dict(row) for row in cursor.fetchall()]
-            return matching_users
\ No newline at end of file
+
+            users = {}
+            for row in cursor.fetchall():
+                if row['id'] in users:
+                    continue
+                if _contains_phrase(tweet_text_lower, row['matched_keyword']):
+                    user = dict(row)
+                    del user['matched_keyword']
+                    users[row['id']] = user
+
+            return list(users.values())
+# Shared instance used across the application. Importing this instead of
+# constructing Database() avoids re-running schema setup per module and
+# keeps every caller on the same connection pool and caches.
+db = Database()
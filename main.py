@@ -11,20 +11,23 @@ import time
 import signal
 import sys
 import os
+import threading
 
-from config import setup_logging, WEBHOOK_HOST, WEBHOOK_PORT, ADMIN_IDS
-from bot_handlers import bot
+from waitress import serve
+
+from config import (
+    setup_logging, stop_logging, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_URL,
+    TELEGRAM_ALLOWED_UPDATES, ADMIN_IDS
+)
+from bot_handlers import bot, register_bot_commands
 from webhook import app, setup_webhook, remove_webhook
 from monitor import monitor
 from admin_commands import register_admin_commands
-from database import Database
+from database import db
 
 # Initialize main logger
 logger = logging.getLogger(__name__)
 
-# Initialize database
-db = Database()
-
 def signal_handler(sig, frame):
     """Handle termination signals gracefully."""
     logger.info("Received termination signal. Shutting down...")
@@ -39,6 +42,10 @@ def signal_handler(sig, frame):
     db.backup_database()
     
     logger.info("Shutdown complete. Exiting.")
+
+    # Flush queued log records before exiting
+    stop_logging()
+
     sys.exit(0)
 
 def setup():
@@ -50,6 +57,9 @@ def setup():
     # Register admin commands
     register_admin_commands()
     logger.info("Admin commands registered")
+
+    # Publish the command menu so Telegram clients render it natively
+    register_bot_commands()
     
     # Add default admin if specified
     if not ADMIN_IDS:
@@ -63,9 +73,13 @@ def setup():
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    # Set up webhook
-    setup_webhook()
-    logger.info("Webhook set up")
+    # Set up webhook when configured; otherwise long polling takes over
+    if WEBHOOK_URL:
+        setup_webhook()
+        logger.info("Webhook set up")
+    else:
+        remove_webhook()
+        logger.info("No WEBHOOK_URL configured; using long polling for Telegram updates")
     
     # Create database backup directory if it doesn't exist
     os.makedirs("backups", exist_ok=True)
@@ -77,11 +91,30 @@ def setup():
     
     logger.info("Setup complete")
 
+def run_polling():
+    """Receive Telegram updates via long polling."""
+    logger.info("Starting long polling")
+    bot.infinity_polling(
+        timeout=50,
+        long_polling_timeout=50,
+        skip_pending=True,
+        allowed_updates=TELEGRAM_ALLOWED_UPDATES
+    )
+
 def run_app():
     """Run the Flask application."""
     try:
+        # Without a webhook, Telegram updates arrive over a held long-poll
+        # connection in a background thread; Flask still serves the tweet
+        # notification endpoint.
+        if not WEBHOOK_URL:
+            polling_thread = threading.Thread(target=run_polling, daemon=True)
+            polling_thread.start()
+
+        # Waitress handles requests on a thread pool, so concurrent
+        # webhook deliveries stop serializing behind Flask's dev server
         logger.info(f"Starting Flask app on {WEBHOOK_HOST}:{WEBHOOK_PORT}")
-        app.run(host=WEBHOOK_HOST, port=WEBHOOK_PORT, use_reloader=False)
+        serve(app, host=WEBHOOK_HOST, port=WEBHOOK_PORT, threads=8)
     except Exception as e:
         logger.error(f"Error starting Flask app: {e}")
         # Try to remove webhook on error
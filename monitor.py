@@ -1,18 +1,14 @@
-import time
 import logging
 import threading
 from datetime import datetime
 
 from config import DB_POLL_INTERVAL
-from database import Database
+from database import db
 from bot_handlers import generate_invite_link, send_invite
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-# Initialize database
-db = Database()
-
 class GroupMonitor:
     """Monitor groups and handle group assignment to users."""
     
@@ -21,7 +17,14 @@ class GroupMonitor:
         self.poll_interval = poll_interval
         self.running = False
         self.thread = None
-    
+        # Set by group changes so the loop reacts immediately instead of
+        # waiting out the poll interval; the interval stays as a fallback
+        self._wake = threading.Event()
+
+    def notify(self):
+        """Wake the monitor loop ahead of its next scheduled poll."""
+        self._wake.set()
+
     def start(self):
         """Start the group monitoring thread."""
         if self.running:
@@ -38,6 +41,7 @@ class GroupMonitor:
     def stop(self):
         """Stop the group monitoring thread."""
         self.running = False
+        self._wake.set()
         if self.thread:
             self.thread.join(timeout=5.0)
         
@@ -51,8 +55,9 @@ class GroupMonitor:
             except Exception as e:
                 logger.error(f"Error in group monitor: {e}")
             
-            # Sleep for the specified interval
-            time.sleep(self.poll_interval)
+            # Sleep until woken by a group change, or at most one interval
+            self._wake.wait(timeout=self.poll_interval)
+            self._wake.clear()
     
     def _process_groups(self):
         """Process groups that need to be completed with information."""
@@ -75,37 +80,21 @@ class GroupMonitor:
                 continue
             
             logger.info(f"Processing incomplete group: {group_id}")
-            
-            # Find a user who hasn't been assigned a group
-            user = db.get_user_without_group()
-            if not user:
-                logger.info("No available users for group assignment")
-                break
-            
+
             # Generate permanent invite link
             invite_link = generate_invite_link(group_id)
             if not invite_link:
                 logger.error(f"Failed to generate invite link for group {group_id}")
                 continue
-            
-            # Format keywords for group name
-            keywords = ', '.join(user['keywords'][:3]) if user['keywords'] else 'Geral'
-            group_name = f"Grupo de {user['name']} - {keywords}"
-            
-            # Update group information
-            if db.update_group(group_id, group_name, invite_link):
-                logger.info(f"Updated group {group_id} with name '{group_name}'")
-            else:
-                logger.error(f"Failed to update group {group_id}")
-                continue
-            
-            # Update user with the group assignment
-            if db.update_user_group(user['chat_id'], group_id, group_name, invite_link):
-                logger.info(f"Assigned group {group_id} to user {user['name']}")
-            else:
-                logger.error(f"Failed to update user {user['name']} with group {group_id}")
-                continue
-            
+
+            # Claim a user and update both tables in one transaction
+            user, group_name = db.assign_group_to_next_user(group_id, invite_link)
+            if not user:
+                logger.info("No available users for group assignment")
+                break
+
+            logger.info(f"Assigned group {group_id} to user {user['name']} as '{group_name}'")
+
             # Send invite link to the user
             if send_invite(user['chat_id'], invite_link):
                 logger.info(f"Sent invite link to user {user['name']}")
@@ -122,7 +111,7 @@ def process_group(group_id, force_update=False):
         
         # Check if group exists
         group = None
-        with db.get_connection() as conn:
+        with db.get_read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM groups WHERE group_id = ?", (group_id,))
             group = cursor.fetchone()
@@ -144,4 +133,8 @@ def process_group(group_id, force_update=False):
         return False
 
 # Create a singleton instance
-monitor = GroupMonitor()
\ No newline at end of file
+monitor = GroupMonitor()
+
+# Group inserts/updates wake the monitor without monitor<->database
+# import coupling
+db.register_group_listener(monitor.notify)
\ No newline at end of file
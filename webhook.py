@@ -1,11 +1,25 @@
-import json
 import logging
 import hashlib
-from flask import Flask, request, jsonify
+import json
+from flask import Flask, request
 import telebot
 
-from config import WEBHOOK_URL
-from database import Database
+# orjson parses and serializes several times faster than stdlib json;
+# fall back to stdlib when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional fast hash for generated tweet IDs; MD5 plays no security
+# role here, so a non-cryptographic hash is a drop-in replacement
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+from config import WEBHOOK_URL, TELEGRAM_ALLOWED_UPDATES
+from database import db
 from bot_handlers import bot, send_tweet_to_group
 
 # Initialize logger
@@ -14,8 +28,24 @@ logger = logging.getLogger(__name__)
 # Initialize Flask app
 app = Flask(__name__)
 
-# Initialize database
-db = Database()
+def _parse_json_body(raw_data):
+    """Parse a request body as JSON, returning None when it isn't."""
+    if not raw_data:
+        return None
+    try:
+        if orjson is not None:
+            return orjson.loads(raw_data)
+        return json.loads(raw_data)
+    except ValueError:
+        return None
+
+def _json_response(payload, status=200):
+    """Serialize a response payload without going through jsonify."""
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload).encode('utf-8')
+    return body, status, {'Content-Type': 'application/json'}
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
@@ -24,28 +54,24 @@ def webhook():
     This endpoint processes both Telegram updates and tweet notifications.
     """
     try:
-        # Try to get raw data from the request
-        raw_data = request.get_data().decode('utf-8')
-        
+        # Parse the raw bytes once; orjson takes them directly, skipping
+        # the decode step, and telebot accepts the resulting dict
+        data = _parse_json_body(request.get_data())
+
         # Check if it's a Telegram update (has 'update_id')
-        try:
-            data = json.loads(raw_data)
-            if isinstance(data, dict) and 'update_id' in data:
-                # Process Telegram update
-                logger.debug("Received Telegram update")
-                update = telebot.types.Update.de_json(raw_data)
-                bot.process_new_updates([update])
-                return 'OK', 200
-        except json.JSONDecodeError:
-            # Not a JSON payload, might be form data from IFTTT
-            pass
-        
+        if isinstance(data, dict) and 'update_id' in data:
+            # Process Telegram update
+            logger.debug("Received Telegram update")
+            update = telebot.types.Update.de_json(data)
+            bot.process_new_updates([update])
+            return 'OK', 200
+
         # If it's not a Telegram update, try to process as a tweet notification
         return process_tweet_notification(request)
         
     except Exception as e:
         logger.error(f"Error processing webhook: {e}")
-        return jsonify({"error": str(e)}), 500
+        return _json_response({"error": str(e)}, 500)
 
 def process_tweet_notification(request):
     """Process a tweet notification from IFTTT."""
@@ -57,53 +83,50 @@ def process_tweet_notification(request):
     # Validate required fields
     if not tweet_link or not tweet_text:
         logger.warning("Missing required fields in tweet notification")
-        return jsonify({"error": "Fields 'link' and 'text' are required"}), 400
+        return _json_response({"error": "Fields 'link' and 'text' are required"}, 400)
     
-    # Generate an ID if none provided
+    # Generate an ID if none provided; the parts are fed to the hash
+    # separately so no combined intermediate string is allocated
     if not tweet_id:
-        tweet_id = hashlib.md5(f"{tweet_link}:{tweet_text}".encode()).hexdigest()
+        digest = xxhash.xxh64() if xxhash is not None else hashlib.md5()
+        digest.update(tweet_link.encode())
+        digest.update(b':')
+        digest.update(tweet_text.encode())
+        tweet_id = digest.hexdigest()
     
-    # Check if we've already processed this tweet
-    if db.is_tweet_processed(tweet_id):
+    # Record the tweet and find its matching users in one transaction
+    already_processed, users = db.process_tweet(tweet_id, tweet_text, tweet_link)
+    if already_processed:
         logger.info(f"Tweet {tweet_id} already processed, skipping")
-        return jsonify({"message": "Tweet already processed"}), 200
-    
+        return _json_response({"message": "Tweet already processed"})
+
     # Log the received tweet
     logger.info(f"Received tweet notification: {tweet_id}")
     logger.debug(f"Tweet text: {tweet_text}")
     logger.debug(f"Tweet link: {tweet_link}")
-    
-    # Find users whose keywords match the tweet
-    tweet_text_lower = tweet_text.lower()
-    users = db.find_users_by_keywords(tweet_text)
-    
-    # Counter for successful deliveries
-    delivery_count = 0
-    
-    # Send tweet to matching groups
-    processed_groups = set()  # To avoid duplicate notifications
+
+
+    # Fan the sends out on the shared sender pool, one per unique group
+    pending = {}  # group_id -> Future; also deduplicates notifications
     for user in users:
         group_id = user.get('group_id')
-        
-        # Skip if no group or already processed
-        if not group_id or group_id in processed_groups:
+
+        # Skip if no group or already queued
+        if not group_id or group_id in pending:
             continue
-        
-        # Try to send tweet to group
-        if send_tweet_to_group(group_id, tweet_text, tweet_link):
-            delivery_count += 1
-            processed_groups.add(group_id)
-    
-    # Save the tweet as processed
-    db.add_tweet(tweet_id, tweet_text, tweet_link)
-    
+
+        pending[group_id] = send_tweet_to_group(group_id, tweet_text, tweet_link)
+
+    # Count the deliveries once all sends have settled
+    delivery_count = sum(1 for future in pending.values() if future.result())
+
     # Return success response
-    return jsonify({
+    return _json_response({
         "message": "Tweet processed successfully",
         "delivery_count": delivery_count,
         "matching_users": len(users),
-        "unique_groups": len(processed_groups)
-    }), 200
+        "unique_groups": len(pending)
+    })
 
 def setup_webhook(url=None):
     """Set up the webhook for the Telegram bot."""
@@ -113,8 +136,8 @@ def setup_webhook(url=None):
         # Remove any existing webhook
         bot.remove_webhook()
         
-        # Set the new webhook
-        bot.set_webhook(url=webhook_url)
+        # Set the new webhook, restricted to the update types we handle
+        bot.set_webhook(url=webhook_url, allowed_updates=TELEGRAM_ALLOWED_UPDATES)
         logger.info(f"Webhook set to {webhook_url}")
         return True
     except Exception as e: